@@ -0,0 +1,51 @@
+"""
+Chain adapters by network type. The scanner class of an adapter fetches
+network heads and block hashes, requests logs of handler topics and decodes
+them to event dataclasses of scanners.base, the adapter tells the supervisor
+which contracts are scanned. A network type is supported by registering
+its adapter, EVM networks share the ethereum adapter.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Type
+
+from scanners.base import ScannerABC
+from scanners.eth.scanner import Scanner as EthereumScanner
+from scanners.tron.scanner import Scanner as TronScanner
+from src.networks.models import Types
+from src.settings import config
+
+
+def no_mint_contract(network) -> Optional[str]:
+    """Mint scanner requests transfers of all committed collections of network"""
+    return None
+
+
+@dataclass(frozen=True)
+class ChainAdapter:
+    scanner_class: Type[ScannerABC]
+    # contract of the mint scanner of a network
+    mint_contract: Callable[..., Optional[str]] = no_mint_contract
+
+    def get_scanner(self, network, contract_type=None, contract=None) -> ScannerABC:
+        return self.scanner_class(network, contract_type, contract=contract)
+
+
+ADAPTERS: Dict[str, ChainAdapter] = {}
+
+
+def register_adapter(network_type: str, adapter: ChainAdapter) -> None:
+    ADAPTERS[network_type.lower()] = adapter
+
+
+def get_adapter(network_type: str) -> ChainAdapter:
+    try:
+        return ADAPTERS[network_type.lower()]
+    except KeyError:
+        raise ValueError(f"No chain adapter for network type {network_type}")
+
+
+register_adapter(Types.ethereum, ChainAdapter(EthereumScanner))
+register_adapter(
+    Types.tron,
+    ChainAdapter(TronScanner, mint_contract=lambda network: config.ORACLE_ADDRESS),
+)
@@ -0,0 +1,108 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from django.db import close_old_connections
+
+from scanners.base import AdaptiveBlockRange
+from scanners.scanners import ScannerAbsolute
+from scanners.utils import get_scanner
+
+
+class Backfill:
+    """
+    Catch up scanner checkpoint with concurrent requests of block ranges.
+    Events are applied in block order and checkpoint moves
+    only over contiguous applied ranges.
+    Scanner of the same checkpoint should be stopped while backfill works.
+    """
+
+    def __init__(
+        self,
+        scanner_absolute: ScannerAbsolute,
+        workers: int = 8,
+        range_size: int = None,
+    ) -> None:
+        self.scanner_absolute = scanner_absolute
+        self.network = scanner_absolute.network
+        self.workers = workers
+        self.range_size = range_size or self.network.get_scanner_max_range(
+            scanner_absolute.handler.TYPE
+        )
+        self.scanner = self.get_scanner()
+        self.handler = scanner_absolute.handler(
+            self.network, self.scanner, scanner_absolute.contract
+        )
+        self.logger = self.handler.logger
+
+    def get_scanner(self):
+        return get_scanner(
+            self.network,
+            self.scanner_absolute.contract_type,
+            self.scanner_absolute.contract,
+        )
+
+    def get_ranges(self, from_block: int, to_block: int) -> List[Tuple[int, int]]:
+        return [
+            (start, min(start + self.range_size - 1, to_block))
+            for start in range(from_block, to_block + 1, self.range_size)
+        ]
+
+    def fetch(self, from_block: int, to_block: int) -> list:
+        """Return events of range, range is split in halves on range size errors"""
+        scanner = self.get_scanner()
+        try:
+            events = getattr(scanner, f"get_events_{self.handler.TYPE}")(
+                from_block,
+                to_block,
+            )
+        except Exception as e:
+            # other errors are not fixed by smaller ranges, like a node outage
+            if from_block == to_block or not AdaptiveBlockRange.is_range_error(e):
+                raise
+            self.logger.warning(
+                f"Backfill {from_block}-{to_block} failed: {type(e).__name__} {e}"
+            )
+            middle = (from_block + to_block) // 2
+            return self.fetch(from_block, middle) + self.fetch(middle + 1, to_block)
+        finally:
+            close_old_connections()
+        return sorted(events, key=scanner.get_event_position)
+
+    def fetch_range(self, from_block: int, to_block: int) -> Tuple[list, str]:
+        """Return events of range and hash of its last block, taken before events"""
+        block_hash = self.get_scanner().get_block_hash(to_block)
+        return self.fetch(from_block, to_block), block_hash
+
+    def run(self, from_block: int = None, to_block: int = None) -> None:
+        block_name = self.scanner_absolute.block_name
+        if from_block is None:
+            from_block = self.scanner.get_last_block(block_name)
+        if to_block is None:
+            to_block = self.scanner.get_network_head()
+        ranges = deque(self.get_ranges(from_block, to_block))
+        self.logger.info(
+            f"Backfill {block_name}: blocks {from_block}-{to_block}, "
+            f"{len(ranges)} ranges, {self.workers} workers"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # results are awaited in range order, so only a window
+            # of ranges is requested ahead to bound memory
+            pending = deque()
+            while ranges or pending:
+                while ranges and len(pending) < self.workers * 4:
+                    block_range = ranges.popleft()
+                    pending.append(
+                        (block_range, executor.submit(self.fetch_range, *block_range))
+                    )
+                (range_from, range_to), future = pending.popleft()
+                events, block_hash = future.result()
+                if events:
+                    self.handler.save_events(events)
+                self.scanner.save_last_block(block_name, range_to, block_hash)
+                self.logger.debug(
+                    f"Backfill {block_name}: {range_from}-{range_to}, "
+                    f"{len(events)} events"
+                )
+        self.logger.info(f"Backfill {block_name} finished on block {to_block}")
@@ -1,10 +1,14 @@
+import asyncio
 import logging
-import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Iterable, Optional
+
+import httpx
+import requests
 
 from src.accounts.models import AdvUser
+from src.accounts.services.owners import get_or_create_owners
 from src.settings import config
 from src.utilities import RedisClient
 
@@ -31,11 +35,20 @@ class HandlerABC(ABC):
         self.logger = loggers.get(logger_name)
 
     def get_owner(self, owner_address: str) -> Optional[AdvUser]:
-        try:
-            user = AdvUser.objects.get(username__iexact=owner_address)
-        except AdvUser.DoesNotExist:
-            user = AdvUser.objects.create_user(username=owner_address)
-        return user
+        return self.get_owners([owner_address])[owner_address.lower()]
+
+    def get_owners(self, owner_addresses: Iterable[str]) -> Dict[str, AdvUser]:
+        """
+        Return users by lowercase addresses, missing users are created.
+        Users are loaded with id only, enough to be set as foreign keys,
+        ids are cached by get_or_create_owners. str() of such a user
+        queries the database, log them by id.
+        """
+        owners = get_or_create_owners(owner_addresses)
+        return {
+            address: AdvUser.from_db(AdvUser.objects.db, ["id"], [user_id])
+            for address, user_id in owners.items()
+        }
 
     def get_file_handler(self, name):
         file_handler = logging.FileHandler(f"logs/{name}.log")
@@ -64,34 +77,178 @@ class HandlerABC(ABC):
     def save_event(self) -> None:
         ...
 
+    def save_events(self, event_list) -> None:
+        for event_data in event_list:
+            self.save_event(event_data)
+
+    def rollback(self, fork_block: int) -> None:
+        """Revert changes made by events after fork_block, called on reorg"""
+        ...
+
 
 class ScannerABC(ABC):
+    # size of the ring buffer of recent block hashes of a network
+    RECENT_BLOCKS = 128
+
     def __init__(self, network, contract_type=None, contract=None):
         self.network = network
         self.contract_type = contract_type
         self.contract = contract
 
-    def sleep(self) -> None:
-        time.sleep(config.SCANNER_SLEEP)
+    async def get_events_async(
+        self, handler_type, last_checked_block, last_network_block, executor=None
+    ) -> list:
+        """Fetch events of handler type without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            getattr(self, f"get_events_{handler_type}"),
+            last_checked_block,
+            last_network_block,
+        )
 
-    def save_last_block(self, name, block) -> None:
+    def save_last_block(self, name, block, block_hash=None) -> None:
+        """
+        Save checkpoint number and hash, the hash is also added
+        to the ring buffer of recent blocks of the network.
+        Hash of a scanned range is taken before its events are fetched,
+        it is requested here only for checkpoints without events.
+        """
         redis_ = RedisClient()
-        redis_.connection.set(name, block)
+        if block_hash is None:
+            block_hash = self.get_block_hash(block)
+        blocks_name = f"blocks_{self.network.name}"
+        with redis_.connection.pipeline() as pipe:
+            pipe.set(name, block)
+            pipe.set(f"{name}_hash", block_hash)
+            pipe.zadd(blocks_name, {f"{block}:{block_hash}": block})
+            pipe.zremrangebyrank(blocks_name, 0, -self.RECENT_BLOCKS - 1)
+            pipe.execute()
 
     def get_last_block(self, name) -> int:
         redis_ = RedisClient()
         last_block_number = redis_.connection.get(name)
         if not last_block_number:
-            last_block_number = self.get_last_network_block()
+            last_block_number = self.get_initial_block(name)
             if not last_block_number:
                 return None
             self.save_last_block(name, last_block_number)
         return int(last_block_number)
 
+    def get_initial_block(self, name) -> Optional[int]:
+        """Block of a new checkpoint, new scanners start from the network head"""
+        return self.get_network_head()
+
+    def get_network_head(self) -> Optional[int]:
+        """
+        Return last network block shared by all scanners of the network.
+        Head is cached in redis for SCANNER_HEAD_TTL seconds,
+        so only one scanner requests the node per interval.
+        """
+        redis_ = RedisClient()
+        name = f"head_{self.network.name}"
+        head = redis_.connection.get(name)
+        if head is None:
+            with redis_.connection.lock(f"{name}_lock", timeout=30):
+                head = redis_.connection.get(name)
+                if head is None:
+                    head = self.get_last_network_block()
+                    if not head:
+                        return None
+                    redis_.connection.set(name, head, ex=self.head_ttl)
+        return int(head)
+
+    def find_fork_block(self, name) -> Optional[int]:
+        """
+        Return last block of the checkpoint which is still in the chain
+        if the checkpoint block was reorganized, None otherwise.
+        """
+        redis_ = RedisClient()
+        checkpoint = redis_.connection.get(name)
+        checkpoint_hash = redis_.connection.get(f"{name}_hash")
+        if not checkpoint or not checkpoint_hash:
+            return None
+        checkpoint = int(checkpoint)
+        if self.get_block_hash(checkpoint) == checkpoint_hash.decode():
+            return None
+
+        blocks_name = f"blocks_{self.network.name}"
+        recent_blocks = redis_.connection.zrevrangebyscore(
+            blocks_name, checkpoint - 1, "-inf"
+        )
+        fork_block = None
+        for block in recent_blocks:
+            number, block_hash = block.decode().split(":")
+            if self.get_block_hash(int(number)) == block_hash:
+                fork_block = int(number)
+                break
+        if fork_block is None:
+            # reorg is deeper than the ring buffer
+            fork_block = checkpoint - self.RECENT_BLOCKS
+        redis_.connection.zremrangebyscore(blocks_name, f"({fork_block}", "+inf")
+        return fork_block
+
+    @property
+    def head_ttl(self) -> int:
+        return config.SCANNER_HEAD_TTL or max(config.SCANNER_SLEEP // 2, 1)
+
     @abstractmethod
     def get_last_network_block(self) -> int:
         ...
 
+    @abstractmethod
+    def get_block_hash(self, number: int) -> str:
+        ...
+
+
+class AdaptiveBlockRange:
+    """
+    Number of blocks requested by scanner at once.
+    Range grows while responses are small and fast,
+    shrinks on slow responses and on errors of too large requests.
+    """
+
+    MIN_SIZE = 10
+    INITIAL_SIZE = 1000
+    SMALL_RESPONSE = 1000  # events
+    FAST_RESPONSE = 5  # seconds
+    SLOW_RESPONSE = 20  # seconds
+    RANGE_ERRORS = (
+        "more than",
+        "too many",
+        "limit exceeded",
+        "block range",
+        "response size",
+        "timeout",
+        "timed out",
+    )
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max(max_size, self.MIN_SIZE)
+        self.size = min(self.INITIAL_SIZE, self.max_size)
+
+    def update(self, events_count: int, duration: float) -> None:
+        if duration > self.SLOW_RESPONSE:
+            self.size = max(self.size // 2, self.MIN_SIZE)
+        elif events_count < self.SMALL_RESPONSE and duration < self.FAST_RESPONSE:
+            self.size = min(self.size * 2, self.max_size)
+
+    @classmethod
+    def is_range_error(cls, error: Exception) -> bool:
+        """Return True if error is caused by request size or a timeout"""
+        if isinstance(error, (requests.Timeout, httpx.TimeoutException)):
+            return True
+        return any(marker in str(error).lower() for marker in cls.RANGE_ERRORS)
+
+    def shrink_on(self, error: Exception) -> bool:
+        """Shrink range if error is caused by request size, return True to retry"""
+        if not self.is_range_error(error):
+            return False
+        if self.size <= self.MIN_SIZE:
+            return False
+        self.size = max(self.size // 2, self.MIN_SIZE)
+        return True
+
 
 @dataclass
 class DeployData:
@@ -110,6 +267,8 @@ class BuyData:
     tx_hash: str
     currency_address: str
     collection_address: str
+    block_number: Optional[int] = None
+    log_index: Optional[int] = None
 
 
 @dataclass
@@ -127,3 +286,5 @@ class MintData:
     tx_hash: str
     amount: int
     contract: Optional[str]
+    block_number: Optional[int] = None
+    log_index: Optional[int] = None
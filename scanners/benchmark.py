@@ -0,0 +1,268 @@
+"""
+Benchmark of scanner event decoding and saving on events of both chains.
+Events in scanners/fixtures are synthetic: they have the format of node
+responses, but hashes, addresses and blocks are made up.
+
+    python scanners/benchmark.py --repeat 200
+    python scanners/benchmark.py --database  # end to end, writes are rolled back
+
+The database benchmark uses the database of the settings,
+run it against a local Postgres only.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "src.settings")
+import django
+
+django.setup()
+
+from django.db import transaction
+from hexbytes import HexBytes
+from mixer.backend.django import mixer
+from web3 import Web3
+from web3._utils.events import get_event_data
+
+from scanners.eth.mixins import BUY_EVENTS, MINT_EVENTS
+from scanners.eth.scanner import Scanner as EthereumScanner
+from scanners.scanners import HandlerBuy, HandlerMintTransferBurn
+from scanners.tron.scanner import Scanner as TronScanner
+from src.networks.addresses import hex_to_tron
+from src.store.models import Status
+
+FIXTURES = Path(__file__).parent / "fixtures"
+ETHEREUM_EVENTS = {**MINT_EVENTS, **BUY_EVENTS["ERC721"], **BUY_EVENTS["ERC1155"]}
+CODEC = Web3().codec
+
+
+def load(name):
+    with (FIXTURES / f"{name}.json").open() as f:
+        return json.load(f)
+
+
+def load_ethereum_logs(name):
+    """Return logs in the format of web3 get_logs response"""
+    logs = load(name)
+    for log in logs:
+        log["topics"] = [HexBytes(topic) for topic in log["topics"]]
+        log["blockHash"] = HexBytes(log["blockHash"])
+        log["transactionHash"] = HexBytes(log["transactionHash"])
+    return logs
+
+
+def decode_ethereum_log(log):
+    return get_event_data(CODEC, ETHEREUM_EVENTS[bytes(log["topics"][0])], log)
+
+
+def measure(name, func, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    report(name, len(items) * repeat, time.perf_counter() - start)
+
+
+def report(name, events_count, seconds):
+    print(f"{name:<45} {events_count / seconds:>12,.0f} events/s")
+
+
+def run_decoding(repeat):
+    ethereum_mint = load_ethereum_logs("ethereum_mint")
+    ethereum_buy = load_ethereum_logs("ethereum_buy")
+    ethereum_scanner = EthereumScanner(network=None)
+    measure("ethereum: decode mint logs", decode_ethereum_log, ethereum_mint, repeat)
+    measure("ethereum: decode buy logs", decode_ethereum_log, ethereum_buy, repeat)
+    measure(
+        "ethereum: parse_data_mint",
+        ethereum_scanner.parse_data_mint,
+        [decode_ethereum_log(log) for log in ethereum_mint],
+        repeat,
+    )
+    measure(
+        "ethereum: parse_data_buy",
+        ethereum_scanner.parse_data_buy,
+        [decode_ethereum_log(log) for log in ethereum_buy],
+        repeat,
+    )
+
+    tron_addresses = [
+        address
+        for event in load("tron_mint") + load("tron_buy")
+        for address in event["result"].values()
+        if isinstance(address, str) and address.startswith("0x")
+    ]
+    measure("tron: hex_to_tron", hex_to_tron, tron_addresses, repeat)
+
+    tron_scanner = TronScanner(network=None)
+    measure(
+        "tron: parse_data_mint", tron_scanner.parse_data_mint, load("tron_mint"), repeat
+    )
+    measure(
+        "tron: parse_data_buy", tron_scanner.parse_data_buy, load("tron_buy"), repeat
+    )
+
+
+def get_ipfs_many(tokens):
+    """tokenURI of benchmark tokens, instead of requests to the node"""
+    return [f"{collection.address}/{int(token_id)}" for token_id, collection in tokens]
+
+
+def create_tokens(network, token_owners):
+    """
+    Create collections, tokens and ownerships events refer to.
+    token_owners are (collection address, token id, standart, owner address,
+    minted), the first owner of a token is kept. Tokens minted by events
+    are pending, they are found by ipfs of get_ipfs_many.
+    Addresses of a collection may differ in case between events.
+    """
+    collections = {}
+    users = {}
+    tokens = set()
+    for address, token_id, standart, owner_address, minted in token_owners:
+        if (address.lower(), int(token_id)) in tokens:
+            continue
+        tokens.add((address.lower(), int(token_id)))
+        collection = collections.get(address.lower())
+        if collection is None:
+            collection = collections[address.lower()] = mixer.blend(
+                "store.Collection",
+                network=network,
+                address=address,
+                standart=standart,
+                status=Status.COMMITTED,
+            )
+        owner = users.get(owner_address)
+        if owner is None:
+            owner = users[owner_address] = mixer.blend(
+                "accounts.AdvUser", username=owner_address
+            )
+        quantity = 1 if standart == "ERC721" else 10
+        token = mixer.blend(
+            "store.Token",
+            collection=collection,
+            internal_id=None if minted else token_id,
+            ipfs=f"{collection.address}/{int(token_id)}",
+            status=Status.PENDING if minted else Status.COMMITTED,
+            total_supply=quantity,
+            creator=owner,
+            owner=owner if standart == "ERC721" else None,
+            selling=False,
+        )
+        mixer.blend(
+            "store.Ownership",
+            token=token,
+            owner=owner,
+            quantity=quantity,
+            selling=False,
+        )
+
+
+def get_standart(event):
+    """ERC721 or ERC1155 by event name of both chains"""
+    name = event["event"] if "event" in event else event["event_name"]
+    return "ERC1155" if "1155" in name or name == "TransferSingle" else "ERC721"
+
+
+def run_database(repeat):
+    """Save events of both chains through handlers, nothing is committed"""
+    with mock.patch("scanners.scanners.get_ipfs_many", get_ipfs_many):
+        save_events(
+            "ethereum",
+            EthereumScanner,
+            [decode_ethereum_log(log) for log in load_ethereum_logs("ethereum_mint")],
+            [decode_ethereum_log(log) for log in load_ethereum_logs("ethereum_buy")],
+            repeat,
+        )
+        save_events("tron", TronScanner, load("tron_mint"), load("tron_buy"), repeat)
+
+
+def save_events(network_type, scanner_class, mint_events, buy_events, repeat):
+    empty_address = scanner_class.EMPTY_ADDRESS.lower()
+    os.makedirs("logs", exist_ok=True)
+
+    mint_seconds = buy_seconds = 0
+    for _ in range(repeat):
+        with transaction.atomic():
+            network = mixer.blend("networks.Network", network_type=network_type)
+            scanner = scanner_class(network)
+            mints = [scanner.parse_data_mint(event) for event in mint_events]
+            buys = [scanner.parse_data_buy(event) for event in buy_events]
+            create_tokens(
+                network,
+                [
+                    (
+                        data.contract,
+                        data.token_id,
+                        get_standart(event),
+                        data.new_owner
+                        if data.old_owner == empty_address
+                        else data.old_owner,
+                        data.old_owner == empty_address,
+                    )
+                    for data, event in zip(mints, mint_events)
+                ]
+                + [
+                    (
+                        data.collection_address,
+                        data.token_id,
+                        get_standart(event),
+                        data.seller,
+                        False,
+                    )
+                    for data, event in zip(buys, buy_events)
+                ],
+            )
+            mixer.blend(
+                "rates.UsdRate",
+                network=network,
+                address=buys[0].currency_address,
+                decimal=18,
+                rate=1,
+            )
+
+            handler = HandlerMintTransferBurn(network, scanner)
+            handler.logger.setLevel(logging.WARNING)
+            start = time.perf_counter()
+            handler.save_events(mint_events)
+            mint_seconds += time.perf_counter() - start
+
+            handler = HandlerBuy(network, scanner)
+            handler.logger.setLevel(logging.WARNING)
+            start = time.perf_counter()
+            for event in buy_events:
+                try:
+                    with transaction.atomic():
+                        handler.save_event(event)
+                except Exception as e:
+                    logging.warning(f"Buy is not saved: {type(e).__name__} {e}")
+            buy_seconds += time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+    report(
+        f"{network_type}: HandlerMintTransferBurn.save_events",
+        len(mint_events) * repeat,
+        mint_seconds,
+    )
+    report(
+        f"{network_type}: HandlerBuy.save_event", len(buy_events) * repeat, buy_seconds
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--database", action="store_true")
+    parser.add_argument("--database-repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run_decoding(args.repeat)
+    if args.database:
+        run_database(args.database_repeat)
@@ -1,16 +1,77 @@
+from typing import Optional
+
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+
+from contracts import (
+    ERC721_FABRIC,
+    ERC721_MAIN,
+    ERC1155_FABRIC,
+    ERC1155_MAIN,
+    EXCHANGE,
+    WETH_ABI,
+)
 from scanners.base import ApproveData, BuyData, DeployData, MintData
+from src.store.models import Collection
+from src.utilities import RedisClient
+
+
+def get_event_abi(abi, name):
+    return next(
+        item for item in abi if item.get("type") == "event" and item["name"] == name
+    )
+
+
+def get_events_map(*event_abis):
+    """Return event ABIs by topic of the event signature"""
+    return {event_abi_to_log_topic(event_abi): event_abi for event_abi in event_abis}
+
+
+DEPLOY_EVENTS = {
+    "ERC721": get_events_map(get_event_abi(ERC721_FABRIC, "ERC721Made")),
+    "ERC1155": get_events_map(get_event_abi(ERC1155_FABRIC, "ERC1155Made")),
+}
+BUY_EVENTS = {
+    "ERC721": get_events_map(get_event_abi(EXCHANGE, "ExchangeMadeErc721")),
+    "ERC1155": get_events_map(get_event_abi(EXCHANGE, "ExchangeMadeErc1155")),
+}
+APPROVE_EVENTS = get_events_map(get_event_abi(WETH_ABI, "Approval"))
+MINT_EVENTS = get_events_map(
+    get_event_abi(ERC721_MAIN, "Transfer"),
+    get_event_abi(ERC1155_MAIN, "TransferSingle"),
+)
+
+
+def get_logs(network, address, events, from_block, to_block):
+    """
+    Fetch logs with stateless eth_getLogs and decode them by the topic map,
+    no filter is installed on the node.
+    """
+    logs = network.web3.eth.get_logs(
+        {
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": address,
+            "topics": [list(events)],
+        }
+    )
+    codec = network.web3.codec
+    return [get_event_data(codec, events[bytes(log["topics"][0])], log) for log in logs]
 
 
 class DeployMixin:
     def get_events_deploy(self, last_checked_block, last_network_block):
-        event = {
-            "ERC721": self.network.get_erc721fabric_contract().events.ERC721Made,
-            "ERC1155": self.network.get_erc1155fabric_contract().events.ERC1155Made,
+        address = {
+            "ERC721": self.network.fabric721_address,
+            "ERC1155": self.network.fabric1155_address,
         }[self.contract_type]
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+        return get_logs(
+            self.network,
+            self.network.wrap_in_checksum(address),
+            DEPLOY_EVENTS[self.contract_type],
+            last_checked_block,
+            last_network_block,
+        )
 
     def parse_data_deploy(self, event) -> DeployData:
         return DeployData(
@@ -22,14 +83,13 @@ class DeployMixin:
 
 class BuyMixin:
     def get_events_buy(self, last_checked_block, last_network_block):
-        event = {
-            "ERC721": self.network.get_exchange_contract().events.ExchangeMadeErc721,
-            "ERC1155": self.network.get_exchange_contract().events.ExchangeMadeErc1155,
-        }[self.contract_type]
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+        return get_logs(
+            self.network,
+            self.network.wrap_in_checksum(self.network.exchange_address),
+            BUY_EVENTS[self.contract_type],
+            last_checked_block,
+            last_network_block,
+        )
 
     def parse_data_buy(self, event) -> BuyData:
         return BuyData(
@@ -41,15 +101,20 @@ class BuyMixin:
             tx_hash=event["transactionHash"].hex(),
             token_id=event["args"]["sellId"],
             collection_address=event["args"]["sellTokenAddress"],
+            block_number=event["blockNumber"],
+            log_index=event["logIndex"],
         )
 
 
 class ApproveMixin:
     def get_events_approve(self, last_checked_block, last_network_block):
-        return self.contract.events.Approval.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+        return get_logs(
+            self.network,
+            self.contract.address,
+            APPROVE_EVENTS,
+            last_checked_block,
+            last_network_block,
+        )
 
     def parse_data_approve(self, event) -> ApproveData:
         return ApproveData(
@@ -60,19 +125,58 @@ class ApproveMixin:
 
 
 class MintMixin:
+    # RPC nodes limit the size of an address list in one eth_getLogs request
+    ADDRESSES_CHUNK_SIZE = 500
+
+    def get_mint_addresses(self):
+        """Return contract addresses tracked by mint scanner"""
+        if self.contract is not None:
+            return [self.contract.address]
+        addresses = (
+            Collection.objects.committed()
+            .filter(network=self.network, address__isnull=False)
+            .values_list("address", flat=True)
+        )
+        return [self.network.wrap_in_checksum(address) for address in addresses]
+
+    def get_legacy_mint_block(self, name) -> Optional[int]:
+        """
+        Return earliest checkpoint of per-collection mint scanners, which
+        the network mint scanner replaced, so its first range covers
+        mints after them. None if there are no such checkpoints.
+        """
+        if self.contract is not None or not name.startswith("mint_"):
+            return None
+        collections = (
+            Collection.objects.committed()
+            .filter(network=self.network, address__isnull=False)
+            .values_list("address", "standart")
+        )
+        keys = [
+            f"{name}_{self.network.wrap_in_checksum(address)}_{standart}"
+            for address, standart in collections
+        ]
+        if not keys:
+            return None
+        blocks = [int(block) for block in RedisClient().connection.mget(keys) if block]
+        return min(blocks) if blocks else None
+
     def get_events_mint(self, last_checked_block, last_network_block):
-        event = {
-            "ERC721": self.network.get_erc721main_contract(
-                self.contract.address
-            ).events.Transfer,
-            "ERC1155": self.network.get_erc1155main_contract(
-                self.contract.address
-            ).events.TransferSingle,
-        }[self.contract_type]
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+        """
+        Fetch Transfer and TransferSingle logs of all tracked collections
+        with one eth_getLogs request per chunk of addresses.
+        """
+        addresses = self.get_mint_addresses()
+        events = []
+        for i in range(0, len(addresses), self.ADDRESSES_CHUNK_SIZE):
+            events += get_logs(
+                self.network,
+                addresses[i : i + self.ADDRESSES_CHUNK_SIZE],
+                MINT_EVENTS,
+                last_checked_block,
+                last_network_block,
+            )
+        return sorted(events, key=self.get_event_position)
 
     def parse_data_mint(self, event) -> MintData:
         token_id = event["args"].get("tokenId")
@@ -84,5 +188,7 @@ class MintMixin:
             old_owner=event["args"]["from"].lower(),
             tx_hash=event["transactionHash"].hex(),
             amount=event["args"].get("value", 1),
-            contract=None,
+            contract=event["address"],
+            block_number=event["blockNumber"],
+            log_index=event["logIndex"],
         )
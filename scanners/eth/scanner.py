@@ -1,3 +1,5 @@
+from typing import Optional
+
 from scanners.base import ScannerABC
 from scanners.eth.mixins import ApproveMixin, BuyMixin, DeployMixin, MintMixin
 
@@ -11,5 +13,17 @@ class Scanner(
 ):
     EMPTY_ADDRESS = "0x0000000000000000000000000000000000000000"
 
+    def get_initial_block(self, name) -> Optional[int]:
+        legacy_block = self.get_legacy_mint_block(name)
+        if legacy_block is not None:
+            return legacy_block
+        return super().get_initial_block(name)
+
     def get_last_network_block(self) -> int:
         return self.network.web3.eth.blockNumber
+
+    def get_block_hash(self, number: int) -> str:
+        return self.network.web3.eth.get_block(number)["hash"].hex()
+
+    def get_event_position(self, event) -> tuple:
+        return event["blockNumber"], event["logIndex"]
@@ -0,0 +1,291 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from hexbytes import HexBytes
+from redis.exceptions import LockError, ResponseError
+
+from src.settings import config
+from src.utilities import RedisClient
+
+STREAMS_KEY = "event_streams"
+GROUP = "writers"
+# one writer at a time holds the lock of a stream, so a fixed consumer name
+# lets the next lock holder take over entries pending after a crash
+CONSUMER = "writer"
+
+
+class EventEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, (bytes, HexBytes)):
+            return {"__hex__": HexBytes(obj).hex()}
+        if hasattr(obj, "items"):
+            return dict(obj.items())
+        return super().default(obj)
+
+
+def decode_object(obj):
+    if "__hex__" in obj:
+        return HexBytes(obj["__hex__"])
+    return obj
+
+
+def dump_events(events: list) -> str:
+    return json.dumps(events, cls=EventEncoder)
+
+
+def load_events(data) -> list:
+    return json.loads(data, object_hook=decode_object)
+
+
+class EventQueue:
+    """
+    Redis stream of decoded events of one scanner checkpoint.
+    Scanner appends events of a block range with the hash of its last block,
+    writers check the hash, apply events and move the checkpoint
+    when the entry is acknowledged.
+    """
+
+    LOCK_TIMEOUT = 120  # seconds
+    MAX_LENGTH = 100  # block ranges
+
+    def __init__(self, block_name: str) -> None:
+        self.block_name = block_name
+        self.stream = f"events_{block_name}"
+        self.connection = RedisClient().connection
+        self.read_cursor = None
+
+    @property
+    def cursor_name(self) -> str:
+        """Last block appended to the stream"""
+        return f"{self.block_name}_queued"
+
+    def lock(self, blocking: bool = True):
+        # not thread local, the lock is renewed by a heartbeat thread
+        return self.connection.lock(
+            f"{self.stream}_lock",
+            timeout=self.LOCK_TIMEOUT,
+            blocking_timeout=None if blocking else 0,
+            thread_local=False,
+        )
+
+    @contextmanager
+    def locked(self, blocking: bool = True):
+        """
+        Hold the stream lock, renewed every third of LOCK_TIMEOUT
+        while the block runs. Yield the lock, None if it is taken.
+        Holder checks lock.owned() before writes, the lock is lost
+        only if renewal fails.
+        """
+        lock = self.lock(blocking)
+        if not lock.acquire():
+            yield None
+            return
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self.renew_lock, args=(lock, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            yield lock
+        finally:
+            stop.set()
+            heartbeat.join()
+            try:
+                lock.release()
+            except LockError:
+                logging.warning(f"Lock of {self.stream} expired before release")
+
+    def renew_lock(self, lock, stop: threading.Event) -> None:
+        while not stop.wait(self.LOCK_TIMEOUT / 3):
+            try:
+                lock.reacquire()
+            except Exception as e:
+                logging.error(f"Lock of {self.stream}: {type(e).__name__} {e}")
+                return
+
+    def create_group(self) -> None:
+        try:
+            self.connection.xgroup_create(self.stream, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def get_cursor(self) -> Optional[int]:
+        cursor = self.connection.get(self.cursor_name)
+        # append continues this cursor, unless a writer resets the queue meanwhile
+        self.read_cursor = cursor
+        return int(cursor) if cursor else None
+
+    def get_checkpoint(self) -> Optional[int]:
+        """Last block applied by writers"""
+        checkpoint = self.connection.get(self.block_name)
+        return int(checkpoint) if checkpoint else None
+
+    def is_full(self) -> bool:
+        """Scanner waits while writers are behind"""
+        return self.connection.xlen(self.stream) >= self.MAX_LENGTH
+
+    def append(
+        self,
+        scanner_absolute,
+        events: list,
+        from_block: int,
+        to_block: int,
+        block_hash: str,
+    ) -> bool:
+        """
+        Append events of a block range, which continues the cursor read
+        by get_cursor. Return False if a writer has reset the queue since.
+        """
+        self.create_group()
+        contract = scanner_absolute.contract
+        if contract is not None and not isinstance(contract, str):
+            contract = contract.address
+        fields = {
+            "network": scanner_absolute.network.id,
+            "handler": scanner_absolute.handler.TYPE,
+            "contract_type": scanner_absolute.contract_type or "",
+            "contract": contract or "",
+            "from_block": from_block,
+            "to_block": to_block,
+            "block_hash": block_hash,
+            "events": dump_events(events),
+        }
+
+        def add(pipe) -> bool:
+            if pipe.get(self.cursor_name) != self.read_cursor:
+                return False
+            pipe.multi()
+            pipe.xadd(self.stream, fields)
+            pipe.set(self.cursor_name, to_block)
+            pipe.sadd(STREAMS_KEY, self.stream)
+            return True
+
+        appended = self.connection.transaction(
+            add, self.cursor_name, value_from_callable=True
+        )
+        if appended:
+            self.read_cursor = str(to_block).encode()
+        return appended
+
+    def reset(self, block: int) -> None:
+        """Drop queued events, called with the lock held on reorg"""
+        with self.connection.pipeline() as pipe:
+            pipe.delete(self.stream)
+            pipe.set(self.cursor_name, block)
+            pipe.execute()
+
+    def read(self, count: int) -> list:
+        """Return entries pending after a crash first, then new entries"""
+        self.create_group()
+        for entry_id in ("0", ">"):
+            response = self.connection.xreadgroup(
+                GROUP, CONSUMER, {self.stream: entry_id}, count=count
+            )
+            entries = response[0][1] if response else []
+            if entries:
+                return entries
+        return []
+
+    def ack(self, entry_id) -> None:
+        with self.connection.pipeline() as pipe:
+            pipe.xack(self.stream, GROUP, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            pipe.execute()
+
+
+class EventWriter(threading.Thread):
+    """
+    Writer of queued events. Writers take streams one by one under a lock,
+    so entries of a stream are applied in order while the pool
+    applies different streams in parallel.
+    Entries up to the checkpoint were applied before a crash and are
+    only acknowledged. Entry of reorganized blocks drops the queue,
+    the scanner continues from the checkpoint.
+    """
+
+    BATCH_SIZE = 10
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name, daemon=True)
+        self.connection = RedisClient().connection
+
+    def get_streams(self) -> List[str]:
+        return [stream.decode() for stream in self.connection.smembers(STREAMS_KEY)]
+
+    def run(self) -> None:
+        while True:
+            written = 0
+            for stream in self.get_streams():
+                try:
+                    written += self.write_stream(stream)
+                except Exception as e:
+                    logging.error(
+                        f"Writer {self.name}, {stream}: {type(e).__name__} {e}"
+                    )
+            if not written:
+                time.sleep(config.SCANNER_SLEEP)
+
+    def write_stream(self, stream: str) -> int:
+        queue = EventQueue(stream[len("events_") :])
+        with queue.locked(blocking=False) as lock:
+            if lock is None:
+                return 0
+            written = 0
+            for entry_id, fields in queue.read(self.BATCH_SIZE):
+                if not lock.owned():
+                    logging.warning(f"Writer {self.name} lost lock of {stream}")
+                    break
+                fields = {key.decode(): value.decode() for key, value in fields.items()}
+                checkpoint = queue.get_checkpoint()
+                if checkpoint is None or int(fields["to_block"]) > checkpoint:
+                    if not self.write_entry(queue, fields, checkpoint):
+                        break
+                queue.ack(entry_id)
+                written += 1
+            return written
+
+    def write_entry(self, queue: EventQueue, fields: dict, checkpoint) -> bool:
+        """Apply entry, return False if its blocks are reorganized"""
+        # imported here, scanners module imports the queue
+        from scanners.scanners import HANDLERS, ScannerAbsolute
+        from scanners.utils import get_scanner
+        from src.networks.models import Network
+
+        network = Network.objects.get(id=fields["network"])
+        handler = HANDLERS[fields["handler"]]
+        contract = fields["contract"] or None
+        if contract and handler.TYPE == "approve":
+            contract = network.get_token_contract(contract)
+        scanner_absolute = ScannerAbsolute(
+            network=network,
+            handler=handler,
+            contract_type=fields["contract_type"] or None,
+            contract=contract,
+        )
+        scanner = get_scanner(network, scanner_absolute.contract_type, contract)
+        to_block = int(fields["to_block"])
+        block_hash = fields["block_hash"]
+        if scanner.get_block_hash(to_block) != block_hash:
+            if checkpoint is None:
+                checkpoint = int(fields["from_block"])
+            logging.warning(
+                f"Queued blocks of {queue.block_name} after {checkpoint} "
+                "are reorganized, queue is dropped"
+            )
+            queue.reset(checkpoint)
+            return False
+        events = load_events(fields["events"])
+        db_seconds = scanner_absolute.write_block_range(
+            scanner,
+            handler(network, scanner, contract),
+            events,
+            to_block,
+            block_hash,
+        )
+        scanner_absolute.metrics.observe_write(len(events), db_seconds)
+        return True
@@ -0,0 +1,109 @@
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from typing import List
+
+from src.settings import config
+from src.utilities import RedisClient
+
+MEMBERS_KEY = "scanner_members"
+
+# extend or delete the lease only while it is held by the caller
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class ScannerLeases:
+    """
+    Scanner work units (scanner block names) claimed by scanner processes
+    through redis leases. Every process plans all units and scans the ones
+    it holds. Leases and process membership are renewed by heartbeats,
+    units of a dead process are claimed by others after LEASE_TTL.
+    A process claims at most its share of units among live processes,
+    extra units are released when a new process joins.
+    """
+
+    LEASE_TTL = 15  # seconds
+
+    def __init__(self, units: List[str]) -> None:
+        self.units = units
+        self.ttl = config.SCANNER_LEASE_TTL or self.LEASE_TTL
+        self.member = f"{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.connection = RedisClient().connection
+        self.renew_script = self.connection.register_script(RENEW_SCRIPT)
+        self.release_script = self.connection.register_script(RELEASE_SCRIPT)
+        self.held = set()
+        self.busy = set()  # units with a block range in progress
+        self.share = len(units)
+
+    @property
+    def heartbeat_interval(self) -> float:
+        return self.ttl / 3
+
+    def get_key(self, unit: str) -> str:
+        return f"scanner_lease_{unit}"
+
+    def claim(self, unit: str) -> bool:
+        """Return True if the unit is held by this process"""
+        if unit in self.held:
+            return True
+        if len(self.held) >= self.share:
+            return False
+        if self.connection.set(
+            self.get_key(unit), self.member, nx=True, px=int(self.ttl * 1000)
+        ):
+            logging.info(f"Scanner {self.member} claimed {unit}")
+            self.held.add(unit)
+            return True
+        return False
+
+    def renew(self, unit: str) -> bool:
+        """Extend the lease, return False if it was lost"""
+        if unit not in self.held:
+            return False
+        if self.renew_script(
+            keys=[self.get_key(unit)], args=[self.member, int(self.ttl * 1000)]
+        ):
+            return True
+        logging.warning(f"Scanner {self.member} lost lease of {unit}")
+        self.held.discard(unit)
+        return False
+
+    def release(self, unit: str) -> None:
+        self.release_script(keys=[self.get_key(unit)], args=[self.member])
+        self.held.discard(unit)
+
+    def heartbeat(self) -> None:
+        """Renew membership and leases, release units over the share"""
+        now = time.time()
+        with self.connection.pipeline() as pipe:
+            pipe.zadd(MEMBERS_KEY, {self.member: now})
+            pipe.zremrangebyscore(MEMBERS_KEY, "-inf", now - self.ttl)
+            pipe.zcard(MEMBERS_KEY)
+            members = pipe.execute()[-1]
+        self.share = math.ceil(len(self.units) / max(members, 1))
+
+        for unit in list(self.held):
+            self.renew(unit)
+        extra = len(self.held) - self.share
+        for unit in sorted(self.held - self.busy)[: max(extra, 0)]:
+            logging.info(f"Scanner {self.member} released {unit} to rebalance")
+            self.release(unit)
+
+    def stop(self) -> None:
+        for unit in list(self.held):
+            self.release(unit)
+        self.connection.zrem(MEMBERS_KEY, self.member)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from scanners.leases import ScannerLeases
+from scanners.scanners import ScannerAbsolute
+from scanners.utils import get_scanner, report_error
+from src.settings import config
+
+
+class ScannerRuntime:
+    """
+    Run scanners of all networks and handler types on one event loop.
+    Events are awaited with async clients where a chain has one,
+    blocking RPC calls and ORM writes go to bounded executors,
+    so the number of threads does not grow with the number of scanners.
+    With leases, only scanners claimed by this process are polled.
+    """
+
+    RPC_WORKERS = 16
+    DB_WORKERS = 4
+    ERROR_PAUSE = 60  # seconds
+
+    def __init__(
+        self, scanners: List[ScannerAbsolute], leases: Optional[ScannerLeases] = None
+    ) -> None:
+        self.scanners = scanners
+        self.leases = leases
+        self.rpc_executor = ThreadPoolExecutor(
+            max_workers=config.SCANNER_RPC_WORKERS or self.RPC_WORKERS,
+            thread_name_prefix="scanner_rpc",
+        )
+        self.db_executor = ThreadPoolExecutor(
+            max_workers=config.SCANNER_DB_WORKERS or self.DB_WORKERS,
+            thread_name_prefix="scanner_db",
+        )
+
+    def run(self) -> None:
+        asyncio.run(self.main())
+
+    async def main(self) -> None:
+        logging.info(f"Scanner runtime started with {len(self.scanners)} scanners")
+        polls = [self.poll(scanner) for scanner in self.scanners]
+        if self.leases is None:
+            await asyncio.gather(*polls)
+            return
+        # share of units is known before scanners claim them
+        self.leases.heartbeat()
+        try:
+            await asyncio.gather(self.heartbeat(), *polls)
+        finally:
+            self.leases.stop()
+
+    async def heartbeat(self) -> None:
+        # redis calls are short, they run on the loop to not queue
+        # behind database writes and lose leases
+        while True:
+            await asyncio.sleep(self.leases.heartbeat_interval)
+            try:
+                self.leases.heartbeat()
+            except Exception as e:
+                logging.error(f"Scanner heartbeat: {type(e).__name__} {e}")
+
+    async def run_in(self, executor, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+    async def poll(self, scanner_absolute: ScannerAbsolute) -> None:
+        unit = scanner_absolute.block_name
+        while True:
+            if self.leases is not None and not self.leases.claim(unit):
+                await asyncio.sleep(self.leases.heartbeat_interval)
+                continue
+            try:
+                if self.leases is not None:
+                    self.leases.busy.add(unit)
+                should_sleep = await self.poll_once(scanner_absolute)
+            except Exception as e:
+                # metrics and error counter in redis and alerts block,
+                # they run off the loop
+                if await self.run_in(
+                    self.rpc_executor, self.report_error, scanner_absolute, e
+                ):
+                    await asyncio.sleep(self.ERROR_PAUSE)
+                continue
+            finally:
+                if self.leases is not None:
+                    self.leases.busy.discard(unit)
+            if should_sleep:
+                await asyncio.sleep(config.SCANNER_SLEEP)
+
+    def report_error(self, scanner_absolute: ScannerAbsolute, error: Exception) -> bool:
+        scanner_absolute.metrics.record_error()
+        return report_error(scanner_absolute.network, error)
+
+    async def poll_once(self, scanner_absolute: ScannerAbsolute) -> bool:
+        """Scan next block range of the scanner, return True to wait for blocks"""
+        scanner = get_scanner(
+            scanner_absolute.network,
+            scanner_absolute.contract_type,
+            scanner_absolute.contract,
+        )
+        handler = scanner_absolute.handler(
+            scanner_absolute.network, scanner, scanner_absolute.contract
+        )
+
+        # reorg rollback writes to the database
+        block_range = await self.run_in(
+            self.db_executor, scanner_absolute.get_block_range, scanner, handler
+        )
+        if block_range is None:
+            return True
+        last_checked_block, last_network_block, network_head, block_hash = block_range
+
+        start = time.monotonic()
+        try:
+            event_list = await scanner.get_events_async(
+                handler.TYPE,
+                last_checked_block,
+                last_network_block,
+                executor=self.rpc_executor,
+            )
+        except Exception as e:
+            if scanner_absolute.shrink_block_range(handler, e):
+                return False
+            raise
+        rpc_seconds = time.monotonic() - start
+        scanner_absolute.block_range.update(len(event_list), rpc_seconds)
+
+        if self.leases is not None and not self.leases.renew(
+            scanner_absolute.block_name
+        ):
+            # the unit is scanned by another process now
+            return False
+        await self.run_in(
+            self.db_executor,
+            scanner_absolute.save_block_range,
+            scanner,
+            handler,
+            event_list,
+            last_checked_block,
+            last_network_block,
+            block_hash,
+            rpc_seconds,
+        )
+        # catch up without sleeping while the range is cut by its size
+        return last_network_block == network_head
@@ -1,19 +1,26 @@
-import threading
+import time
 from decimal import Decimal
+from typing import Dict, Optional, Tuple
 
-from django.db.models import F
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
 
-from scanners.base import HandlerABC
-from scanners.utils import get_scanner, never_fall
+from scanners.base import AdaptiveBlockRange, HandlerABC
+from scanners.events_queue import EventQueue
 from src.accounts.models import AdvUser
 from src.activity.models import BidsHistory, TokenHistory
+from src.networks.metrics import ScannerMetrics
 from src.networks.models import Network
+from src.rates.api import calculate_amount
 from src.rates.models import UsdRate
+from src.settings import config
 from src.store.models import Bid, Collection, Ownership, Status, Token
-from src.store.services.ipfs import get_ipfs
+from src.store.services.ipfs import get_ipfs_many
+from src.store.signals import update_token_sell_status
 
 
-class ScannerAbsolute(threading.Thread):
+class ScannerAbsolute:
     """
     ScannerAbsolute launches a scanner of the appropriate type
     depending on the network and calls the resulting handler.
@@ -26,14 +33,15 @@ class ScannerAbsolute(threading.Thread):
         contract_type: str = None,
         contract: object = None,
     ) -> None:
-        super().__init__()
         self.network = network
         self.handler = handler
         self.contract_type = contract_type  # ERC721/ ERC1155
         self.contract = contract
-
-    def run(self):
-        self.start_polling()
+        self.block_range = AdaptiveBlockRange(
+            network.get_scanner_max_range(handler.TYPE)
+        )
+        self.metrics = ScannerMetrics(self.block_name, network.name, handler.TYPE)
+        self.queue = EventQueue(self.block_name) if config.SCANNER_QUEUE else None
 
     @property
     def block_name(self) -> str:
@@ -46,36 +54,96 @@ class ScannerAbsolute(threading.Thread):
         name += f"_{self.contract_type}" if self.contract_type else ""
         return name
 
-    @never_fall
-    def start_polling(self) -> None:
-        while True:
-            scanner = get_scanner(self.network, self.contract_type, self.contract)
-            last_checked_block = scanner.get_last_block(self.block_name)
-            last_network_block = scanner.get_last_network_block()
-
-            if not last_checked_block or not last_network_block:
-                scanner.sleep()
-                continue
+    def get_block_range(self, scanner, handler) -> Optional[Tuple[int, int, int, str]]:
+        """
+        Return (last checked block, last block to scan, network head,
+        hash of the last block to scan), None if scanner should wait for new blocks.
+        Changes after a reorganized checkpoint are rolled back before.
+        """
+        fork_block = scanner.find_fork_block(self.block_name)
+        if fork_block is not None:
+            handler.logger.warning(
+                f"Reorg detected, rolling back {self.block_name} to {fork_block}"
+            )
+            if self.queue is not None:
+                # writers must not apply queued events of reorganized blocks
+                with self.queue.locked():
+                    self.queue.reset(fork_block)
+                    self.rollback(scanner, handler, fork_block)
+            else:
+                self.rollback(scanner, handler, fork_block)
+
+        last_checked_block = scanner.get_last_block(self.block_name)
+        network_head = scanner.get_network_head()
+
+        if not last_checked_block or not network_head:
+            return None
+        if self.queue is not None:
+            if self.queue.is_full():
+                return None
+            last_checked_block = max(
+                last_checked_block, self.queue.get_cursor() or last_checked_block
+            )
 
-            if last_network_block - last_checked_block < 8:
-                scanner.sleep()
-                continue
+        self.metrics.set_head(network_head, last_checked_block)
+        if network_head - last_checked_block < self.network.scanner_min_lag:
+            return None
 
-            # filter cannot support more than 5000 blocks at one query
-            if last_network_block - last_checked_block > 5000:
-                last_network_block = last_checked_block + 4990
+        last_network_block = min(
+            network_head,
+            last_checked_block + self.block_range.size,
+        )
+        # hash is taken before events, so a reorg while they are fetched
+        # leaves the old hash in the checkpoint and is found on the next poll
+        block_hash = scanner.get_block_hash(last_network_block)
+        return last_checked_block, last_network_block, network_head, block_hash
+
+    def shrink_block_range(self, handler, error: Exception) -> bool:
+        """Shrink block range on errors of too large requests, True to retry"""
+        if not self.block_range.shrink_on(error):
+            return False
+        handler.logger.warning(
+            f"{type(error).__name__} {error}, "
+            f"block range is reduced to {self.block_range.size}"
+        )
+        return True
 
-            handler = self.handler(self.network, scanner, self.contract)
+    def rollback(self, scanner, handler, fork_block: int) -> None:
+        with transaction.atomic():
+            handler.rollback(fork_block)
+        scanner.save_last_block(self.block_name, fork_block)
 
-            event_list = getattr(scanner, f"get_events_{handler.TYPE}")(
-                last_checked_block,
-                last_network_block,
-            )
+    def save_block_range(
+        self,
+        scanner,
+        handler,
+        event_list,
+        from_block,
+        last_block,
+        block_hash,
+        rpc_seconds,
+    ) -> None:
+        """Write events or append them to the queue of database writers"""
+        if self.queue is not None:
+            # not appended if writers dropped the queue on reorg,
+            # the range is scanned again from the checkpoint
+            if self.queue.append(self, event_list, from_block, last_block, block_hash):
+                self.metrics.observe_range(len(event_list), rpc_seconds)
+            return
+        db_seconds = self.write_block_range(
+            scanner, handler, event_list, last_block, block_hash
+        )
+        self.metrics.observe_range(len(event_list), rpc_seconds, db_seconds)
 
-            if event_list:
-                list(map(handler.save_event, event_list))
-            scanner.save_last_block(self.block_name, last_network_block)
-            scanner.sleep()
+    def write_block_range(
+        self, scanner, handler, event_list, last_block, block_hash=None
+    ) -> float:
+        """Save events and move the checkpoint, return time of writing"""
+        start = time.monotonic()
+        if event_list:
+            handler.save_events(event_list)
+        scanner.save_last_block(self.block_name, last_block, block_hash)
+        return time.monotonic() - start
 
 
 class HandlerDeploy(HandlerABC):
@@ -97,96 +165,323 @@ class HandlerDeploy(HandlerABC):
             )
 
 
+class OwnershipDelta:
+    """
+    Collect ownership quantity changes of a block range
+    and write them with bulk queries.
+    """
+
+    def __init__(self, token_ids, owner_ids, minted_token_ids=()) -> None:
+        # every ownership of minted tokens is loaded for their listings
+        ownerships = (
+            Ownership.objects.filter(
+                Q(token_id__in=token_ids, owner_id__in=owner_ids)
+                | Q(token_id__in=minted_token_ids)
+            )
+            .select_related("currency")
+            .order_by("id")
+        )
+        self.ownerships = {}
+        self.first_ownerships = {}
+        for ownership in ownerships:
+            self.ownerships[(ownership.token_id, ownership.owner_id)] = ownership
+            self.first_ownerships.setdefault(ownership.token_id, ownership)
+        self.changed = set()
+        self.deleted = set()
+        # ERC1155 tokens with changed selling ownerships
+        self.tokens = {}
+
+    def first(self, token: Token) -> Optional[Ownership]:
+        """The first ownership of a minted token, as token.ownership_set.first()"""
+        ownership = self.first_ownerships.get(token.id)
+        if ownership is not None:
+            ownership.token = token
+        return ownership
+
+    def selling_changed(self, token: Token, ownership: Ownership) -> None:
+        if ownership.selling and token.standart == "ERC1155":
+            self.tokens[token.id] = token
+
+    def decrease(self, token: Token, owner: AdvUser, amount: int) -> bool:
+        key = (token.id, owner.id)
+        ownership = self.ownerships.get(key)
+        if ownership is None:
+            return False
+        ownership.quantity = max(int(ownership.quantity or 0) - int(amount), 0)
+        if ownership.quantity <= 0:
+            self.selling_changed(token, ownership)
+            del self.ownerships[key]
+            self.changed.discard(key)
+            if ownership.id:
+                self.deleted.add(ownership.id)
+        else:
+            self.changed.add(key)
+        return True
+
+    def increase(self, token: Token, owner: AdvUser, amount: int) -> None:
+        key = (token.id, owner.id)
+        ownership = self.ownerships.get(key)
+        if ownership is None:
+            ownership = Ownership(token=token, owner=owner)
+            self.ownerships[key] = ownership
+        self.selling_changed(token, ownership)
+        ownership.quantity = int(ownership.quantity or 0) + int(amount)
+        ownership.currency_price = None
+        ownership.selling = False
+        # bulk queries skip pre_save signal, which stores USD price
+        ownership.token = token
+        ownership.usd_price = ownership.calculate_usd_price()
+        self.changed.add(key)
+
+    def save(self) -> None:
+        Ownership.objects.filter(id__in=self.deleted).delete()
+        changed = [self.ownerships[key] for key in self.changed]
+        Ownership.objects.bulk_update(
+            [ownership for ownership in changed if ownership.id],
+            ["quantity", "currency_price", "selling", "usd_price"],
+        )
+        Ownership.objects.bulk_create(
+            [ownership for ownership in changed if not ownership.id]
+        )
+        # bulk queries skip post_save signals of Ownership,
+        # sell status depends only on selling ownerships
+        for token in self.tokens.values():
+            update_token_sell_status(token)
+
+
 class HandlerMintTransferBurn(HandlerABC):
     TYPE = "mint"
+    TOKEN_FIELDS = (
+        "status",
+        "internal_id",
+        "tx_hash",
+        "total_supply",
+        "owner",
+        "selling",
+        "currency_price",
+        "usd_price",
+    )
 
     def save_event(self, event_data):
-        data = self.scanner.parse_data_mint(event_data)
-        collection_address = data.contract or self.contract.address
-        try:
-            collection = Collection.objects.get(
-                network=self.network,
-                address__iexact=collection_address,
-            )
-        except Collection.DoesNotExist:
-            self.logger.warning(
-                f"Collection not found. Network: {self.network}, address: {collection_address}"
-            )
-            return
-        token_id = data.token_id
-
-        token = self.get_buyable_token(
-            token_id=token_id,
-            collection=collection,
-            is_mint=bool(data.old_owner == self.scanner.EMPTY_ADDRESS.lower()),
+        self.save_events([event_data])
+
+    def save_events(self, event_list):
+        """
+        Apply events of a block range in one transaction.
+        Collections, tokens, owners and saved history are fetched in bulk before.
+        """
+        empty_address = self.scanner.EMPTY_ADDRESS.lower()
+        events = [self.scanner.parse_data_mint(event) for event in event_list]
+        collections = self.get_collections(events)
+
+        events = [
+            (data, collections.get(self.get_collection_address(data)))
+            for data in events
+        ]
+        for data, collection in events:
+            if collection is None:
+                self.logger.warning(
+                    f"Collection not found. Network: {self.network}, "
+                    f"address: {self.get_collection_address(data)}"
+                )
+        events = [(data, collection) for data, collection in events if collection]
+
+        minted_tokens = self.get_minted_tokens(
+            [
+                (data, collection)
+                for data, collection in events
+                if data.old_owner == empty_address
+            ]
+        )
+        tokens = self.get_tokens(
+            [
+                (data, collection)
+                for data, collection in events
+                if data.old_owner != empty_address
+            ]
         )
-        if token is None:
-            self.logger.warning("Token not found")
-            return
 
-        if data.old_owner == self.scanner.EMPTY_ADDRESS.lower():
-            self.logger.debug(f"New mint event: {data}")
-            new_owner = self.get_owner(data.new_owner)
-            self.mint_event(
-                token=token,
-                token_id=token_id,
-                tx_hash=data.tx_hash,
-                new_owner=new_owner,
-            )
-        elif data.new_owner == self.scanner.EMPTY_ADDRESS.lower():
-            self.logger.debug(f"New burn event: {data}")
-            old_owner = self.get_owner(data.old_owner)
-            self.burn_event(
-                token=token,
-                tx_hash=data.tx_hash,
-                amount=data.amount,
-                old_owner=old_owner,
-            )
-            self.ownership_quantity_update(
-                token=token,
-                old_owner=old_owner,
-                new_owner=None,
-                amount=data.amount,
-            )
-        else:
-            self.logger.debug(f"New transfer event: {data}")
-            new_owner = self.get_owner(data.new_owner)
-            old_owner = self.get_owner(data.old_owner)
+        # a token minted in this range is found by internal_id after its mint event
+        known_tokens = set(tokens)
+        event_tokens = []
+        for data, collection in events:
+            key = (collection.id, int(data.token_id))
+            if data.old_owner == empty_address:
+                token = minted_tokens.get(key)
+                if token is not None:
+                    known_tokens.add(key)
+            else:
+                token = key if key in known_tokens else None
+            if token is None:
+                self.logger.warning("Token not found")
+                continue
+            event_tokens.append((data, key))
 
-            if TokenHistory.objects.filter(tx_hash=data.tx_hash).exists():
-                return
+        owners = self.get_owners(
+            address
+            for data, _ in event_tokens
+            for address in (data.new_owner, data.old_owner)
+            if address != empty_address
+        )
+        history = TokenHistory.objects.filter(
+            tx_hash__in={data.tx_hash for data, _ in event_tokens}
+        ).values_list("tx_hash", "log_index", "token_id", "method")
+
+        with transaction.atomic():
+            # events are keyed by (tx_hash, log_index),
+            # history without log index is keyed by (tx_hash, token, method)
+            self.saved_events = set()
+            self.history = set()
+            self.buy_tx_hashes = set()
+            for tx_hash, log_index, token_id, method in history:
+                if log_index is None:
+                    self.history.add((tx_hash, token_id, method))
+                else:
+                    self.saved_events.add((tx_hash, log_index))
+                if method == "Buy":
+                    self.buy_tx_hashes.add(tx_hash)
+            self.new_history = []
+            self.changed_tokens = {}
+            self.ownerships = OwnershipDelta(
+                token_ids=[token.id for token in tokens.values()]
+                + [token.id for token in minted_tokens.values()],
+                owner_ids=[owner.id for owner in owners.values()],
+                minted_token_ids=[token.id for token in minted_tokens.values()],
+            )
+            for data, key in event_tokens:
+                self.block_number = data.block_number
+                self.log_index = data.log_index
+                if data.old_owner == empty_address:
+                    self.logger.debug(f"New mint event: {data}")
+                    token = minted_tokens[key]
+                    tokens[key] = token
+                    self.mint_event(
+                        token=token,
+                        token_id=data.token_id,
+                        tx_hash=data.tx_hash,
+                        new_owner=owners[data.new_owner],
+                    )
+                elif data.new_owner == empty_address:
+                    self.logger.debug(f"New burn event: {data}")
+                    token = tokens[key]
+                    if self.is_saved(data.tx_hash, token, "Burn"):
+                        continue
+                    old_owner = owners[data.old_owner]
+                    self.burn_event(
+                        token=token,
+                        tx_hash=data.tx_hash,
+                        amount=data.amount,
+                        old_owner=old_owner,
+                    )
+                    self.ownership_quantity_update(
+                        token=token,
+                        old_owner=old_owner,
+                        new_owner=None,
+                        amount=data.amount,
+                    )
+                else:
+                    self.logger.debug(f"New transfer event: {data}")
+                    token = tokens[key]
+                    # ownership of a sale is moved by the buy handler
+                    if data.tx_hash in self.buy_tx_hashes or self.is_saved(
+                        data.tx_hash, token, "Transfer"
+                    ):
+                        continue
+                    new_owner = owners[data.new_owner]
+                    old_owner = owners[data.old_owner]
+                    self.transfer_event(
+                        token=token,
+                        tx_hash=data.tx_hash,
+                        token_id=data.token_id,
+                        new_owner=new_owner,
+                        old_owner=old_owner,
+                        amount=data.amount,
+                    )
+                    self.ownership_quantity_update(
+                        token=token,
+                        old_owner=old_owner,
+                        new_owner=new_owner,
+                        amount=data.amount,
+                    )
+            self.save_changes()
+
+    def get_collection_address(self, data) -> str:
+        return (data.contract or self.contract.address).lower()
+
+    def get_collections(self, events) -> Dict[str, Collection]:
+        addresses = {self.get_collection_address(data) for data in events}
+        collections = (
+            Collection.objects.filter(network=self.network)
+            .annotate(address_lower=Lower("address"))
+            .filter(address_lower__in=addresses)
+            .select_related("network")
+        )
+        return {collection.address.lower(): collection for collection in collections}
 
-            self.transfer_event(
-                token=token,
-                tx_hash=data.tx_hash,
-                token_id=token_id,
-                new_owner=new_owner,
-                old_owner=old_owner,
-                amount=data.amount,
+    def get_minted_tokens(self, events) -> Dict[Tuple[int, int], Token]:
+        """Return tokens of mint events by (collection id, token id)"""
+        ipfs_values = get_ipfs_many(
+            [(data.token_id, collection) for data, collection in events]
+        )
+        # tokenURI of a failed call is None, its token is not found
+        ipfs_list = {
+            (collection.id, int(data.token_id)): (collection.id, ipfs)
+            for (data, collection), ipfs in zip(events, ipfs_values)
+            if ipfs is not None
+        }
+        tokens = {}
+        queryset = (
+            Token.objects.filter(
+                collection_id__in={key[0] for key in ipfs_list},
+                ipfs__in={ipfs for _, ipfs in ipfs_list.values()},
             )
-            self.ownership_quantity_update(
-                token=token,
-                old_owner=old_owner,
-                new_owner=new_owner,
-                amount=data.amount,
+            .select_related("collection", "currency")
+            .order_by("id")
+        )
+        for token in queryset:
+            tokens.setdefault((token.collection_id, token.ipfs), token)
+        return {key: tokens[ipfs] for key, ipfs in ipfs_list.items() if ipfs in tokens}
+
+    def get_tokens(self, events) -> Dict[Tuple[int, int], Token]:
+        """Return tokens of transfer and burn events by (collection id, token id)"""
+        tokens = {}
+        queryset = (
+            Token.objects.filter(
+                collection_id__in={collection.id for _, collection in events},
+                internal_id__in={int(data.token_id) for data, _ in events},
             )
-
-    def get_buyable_token(
-        self,
-        token_id: int,
-        collection: Collection,
-        is_mint: bool,
-    ) -> Token:
-        if is_mint:
-            ipfs = get_ipfs(token_id, collection)
-            return Token.objects.filter(
-                ipfs=ipfs,
-                collection=collection,
-            ).first()
-        return Token.objects.filter(
-            internal_id=token_id,
-            collection=collection,
-        ).first()
+            .select_related("collection", "currency")
+            .order_by("id")
+        )
+        for token in queryset:
+            tokens.setdefault((token.collection_id, token.internal_id), token)
+        return tokens
+
+    def is_saved(self, tx_hash: str, token: Token, method: str) -> bool:
+        if (tx_hash, self.log_index) in self.saved_events:
+            return True
+        return (tx_hash, token.id, method) in self.history
+
+    def add_history(self, **kwargs) -> None:
+        kwargs.setdefault("block_number", self.block_number)
+        kwargs.setdefault("log_index", self.log_index)
+        if kwargs["log_index"] is None:
+            self.history.add((kwargs["tx_hash"], kwargs["token"].id, kwargs["method"]))
+        else:
+            self.saved_events.add((kwargs["tx_hash"], kwargs["log_index"]))
+        self.new_history.append(TokenHistory(**kwargs))
+
+    def save_changes(self) -> None:
+        tokens = list(self.changed_tokens.values())
+        # bulk_update skips pre_save signal, which stores USD price
+        for token in tokens:
+            token.usd_price = token.calculate_usd_price()
+        Token.objects.bulk_update(tokens, self.TOKEN_FIELDS)
+        burned = [token.id for token in tokens if token.status == Status.BURNED]
+        if burned:
+            Bid.objects.filter(token_id__in=burned).delete()
+        TokenHistory.objects.bulk_create(self.new_history, ignore_conflicts=True)
+        self.ownerships.save()
 
     def mint_event(
         self,
@@ -198,16 +493,17 @@ class HandlerMintTransferBurn(HandlerABC):
         token.status = Status.COMMITTED
         token.internal_id = token_id
         token.tx_hash = tx_hash
-        token.save()
+        self.changed_tokens[token.id] = token
 
-        TokenHistory.objects.get_or_create(
-            token=token,
-            tx_hash=tx_hash,
-            method="Mint",
-            new_owner=new_owner,
-            old_owner=None,
-            price=None,
-        )
+        if not self.is_saved(tx_hash, token, "Mint"):
+            self.add_history(
+                token=token,
+                tx_hash=tx_hash,
+                method="Mint",
+                new_owner=new_owner,
+                old_owner=None,
+                price=None,
+            )
 
         if token.collection.standart == "ERC721":
             price = token.price
@@ -215,23 +511,34 @@ class HandlerMintTransferBurn(HandlerABC):
             if token.minimal_bid:
                 price = token.minimal_bid
         else:
-            price = token.ownership_set.first().price
-            currency = token.ownership_set.first().currency
-            if token.ownership_set.first().minimal_bid:
-                price = token.ownership_set.first().minimal_bid
-        if price:
-            price = price / token.currency.get_decimals
-        if token.selling and price:
-            TokenHistory.objects.create(
-                token=token,
-                old_owner=token.creator,
-                new_owner=None,
-                method="Listing",
-                tx_hash=tx_hash,
-                amount=token.total_supply,
-                price=price,
-                currency=currency,
-            )
+            ownership = self.ownerships.first(token)
+            if ownership is None:
+                self.logger.warning(f"Ownership of minted token {token.id} not found")
+                return
+            price = ownership.price
+            currency = ownership.currency
+            if ownership.minimal_bid:
+                price = ownership.minimal_bid
+        if not (token.selling and price):
+            return
+        if (tx_hash, token.id, "Listing") in self.history:
+            return
+        # bulk_create skips post_save signal, which calculates USD price
+        usd_price = None
+        if currency:
+            usd_price, _ = calculate_amount(price, currency.symbol)
+        self.add_history(
+            token=token,
+            old_owner=token.creator,
+            new_owner=None,
+            method="Listing",
+            tx_hash=tx_hash,
+            log_index=None,
+            amount=token.total_supply,
+            price=price / token.currency.get_decimals,
+            USD_price=usd_price,
+            currency=currency,
+        )
 
     def burn_event(
         self,
@@ -242,14 +549,12 @@ class HandlerMintTransferBurn(HandlerABC):
     ) -> None:
         if token.standart == "ERC721":
             token.status = Status.BURNED
-            token.bid_set.all().delete()
         else:
             token.total_supply = max(int(token.total_supply) - int(amount), 0)
             if token.total_supply == 0:
                 token.status = Status.BURNED
-                token.bid_set.all().delete()
-        token.save()
-        TokenHistory.objects.get_or_create(
+        self.changed_tokens[token.id] = token
+        self.add_history(
             token=token,
             tx_hash=tx_hash,
             method="Burn",
@@ -275,19 +580,16 @@ class HandlerMintTransferBurn(HandlerABC):
             token.owner = new_owner
             token.selling = False
             token.currency_price = None
+        self.changed_tokens[token.id] = token
 
-        token.save()
-
-        TokenHistory.objects.update_or_create(
+        self.add_history(
             tx_hash=tx_hash,
-            defaults={
-                "method": "Transfer",
-                "token": token,
-                "price": None,
-                "amount": amount,
-                "new_owner": new_owner,
-                "old_owner": old_owner,
-            },
+            method="Transfer",
+            token=token,
+            price=None,
+            amount=amount,
+            new_owner=new_owner,
+            old_owner=old_owner,
         )
 
     def ownership_quantity_update(
@@ -298,41 +600,85 @@ class HandlerMintTransferBurn(HandlerABC):
         amount: int,
     ) -> None:
         if old_owner is not None:
-            try:
-                ownership = Ownership.objects.get(owner=old_owner, token=token)
-            except Ownership.DoesNotExist:
+            if not self.ownerships.decrease(token, old_owner, amount):
                 self.logger.warning(
-                    f"Ownership is not found: owner {old_owner}, token {token}"
+                    f"Ownership is not found: owner {old_owner.id}, token {token.id}"
                 )
                 return
-            ownership.quantity = max(int(ownership.quantity) - int(amount), 0)
-            ownership.save()
-            if ownership.quantity <= 0:
-                ownership.delete()
 
         if new_owner is not None:
-            ownership, created = Ownership.objects.update_or_create(
-                owner=new_owner,
-                token=token,
-                defaults={
-                    "currency_price": None,
-                    "selling": False,
-                },
+            self.ownerships.increase(token, new_owner, amount)
+
+    def rollback(self, fork_block: int) -> None:
+        """Revert mint, burn and transfer history after fork_block in reverse order"""
+        history = list(
+            TokenHistory.objects.filter(
+                token__collection__network=self.network,
+                block_number__gt=fork_block,
+                method__in=("Mint", "Burn", "Transfer", "Listing"),
             )
-            if ownership.quantity:
-                ownership.quantity = F("quantity") + amount
-            else:
-                ownership.quantity = amount
-            ownership.save()
-            if created:
-                token.owners.add(new_owner)
+            .select_related("token__collection", "new_owner", "old_owner")
+            .order_by("-block_number", "-id")
+        )
+        if not history:
+            return
+        tokens = {record.token_id: record.token for record in history}
+        ownerships = OwnershipDelta(
+            token_ids=list(tokens),
+            owner_ids={
+                owner_id
+                for record in history
+                for owner_id in (record.new_owner_id, record.old_owner_id)
+                if owner_id
+            },
+        )
+        for record in history:
+            token = tokens[record.token_id]
+            amount = record.amount or 1
+            if record.method == "Mint":
+                token.status = Status.PENDING
+            elif record.method == "Burn":
+                if token.standart != "ERC721":
+                    token.total_supply = int(token.total_supply) + int(amount)
+                token.status = Status.COMMITTED
+                ownerships.increase(token, record.old_owner, amount)
+            elif record.method == "Transfer":
+                if token.standart == "ERC721":
+                    token.owner = record.old_owner
+                ownerships.decrease(token, record.new_owner, amount)
+                ownerships.increase(token, record.old_owner, amount)
+
+        Token.objects.bulk_update(tokens.values(), self.TOKEN_FIELDS)
+        TokenHistory.objects.filter(id__in=[record.id for record in history]).delete()
+        ownerships.save()
+        self.logger.info(f"Rolled back {len(history)} history records")
 
 
 class HandlerBuy(HandlerABC):
     TYPE = "buy"
 
     def save_event(self, event_data):
-        data = self.scanner.parse_data_buy(event_data)
+        self.save_events([event_data])
+
+    def save_events(self, event_list):
+        """Apply buys in one transaction, buys saved before are skipped"""
+        events = [self.scanner.parse_data_buy(event) for event in event_list]
+        saved_events = set(
+            TokenHistory.objects.filter(
+                tx_hash__in={data.tx_hash for data in events},
+                method="Buy",
+            ).values_list("tx_hash", "log_index")
+        )
+        with transaction.atomic():
+            for data in events:
+                key = (data.tx_hash, data.log_index)
+                # buys saved without log index are matched by tx_hash
+                if key in saved_events or (data.tx_hash, None) in saved_events:
+                    continue
+                self.save_buy(data)
+                saved_events.add(key)
+
+    def save_buy(self, data):
         self.logger.debug(f"New event: {data}")
 
         token = Token.objects.get(
@@ -340,12 +686,16 @@ class HandlerBuy(HandlerABC):
             internal_id=data.token_id,
         )
 
+        owners = self.get_owners([data.buyer, data.seller])
+        self.buyer = owners[data.buyer.lower()]
+        self.seller = owners[data.seller.lower()]
+
         getattr(self, f"buy_{token.standart}")(token, data)
 
         self.refresh_token_history(token, data)
 
     def buy_ERC721(self, token: Token, data):
-        new_owner = self.get_owner(data.buyer)
+        new_owner = self.buyer
         token.owner = new_owner
         token.selling = False
         token.currency_price = None
@@ -353,8 +703,8 @@ class HandlerBuy(HandlerABC):
         Bid.objects.filter(token=token).delete()
 
     def buy_ERC1155(self, token: Token, data):
-        new_owner = self.get_owner(data.buyer)
-        old_owner = self.get_owner(data.seller)
+        new_owner = self.buyer
+        old_owner = self.seller
         owner = Ownership.objects.filter(
             owner=new_owner,
             token=token,
@@ -382,7 +732,7 @@ class HandlerBuy(HandlerABC):
                 owner = Ownership.objects.get(owner=old_owner, token=token)
             except Ownership.DoesNotExist:
                 self.logger.warning(
-                    f"Ownership not found owner {old_owner}, token {token}"
+                    f"Ownership not found owner {old_owner.id}, token {token.id}"
                 )
                 return
             owner.quantity = max(int(owner.quantity) - int(data.amount), 0)
@@ -402,8 +752,8 @@ class HandlerBuy(HandlerABC):
                 bet.save()
 
     def refresh_token_history(self, token, data):
-        new_owner = self.get_owner(data.buyer)
-        old_owner = self.get_owner(data.seller)
+        new_owner = self.buyer
+        old_owner = self.seller
 
         currency = UsdRate.objects.filter(
             network=token.collection.network,
@@ -412,19 +762,81 @@ class HandlerBuy(HandlerABC):
 
         decimals = currency.get_decimals
         price = Decimal(int(data.price) / int(decimals))
-
-        TokenHistory.objects.update_or_create(
+        # update and bulk_create skip post_save signal, which calculates USD price
+        usd_price, _ = calculate_amount(int(data.price), currency.symbol)
+
+        fields = {
+            "method": "Buy",
+            "amount": data.amount,
+            "price": price,
+            "USD_price": usd_price,
+            "new_owner": new_owner,
+            "old_owner": old_owner,
+            "currency": currency,
+            "block_number": data.block_number,
+            "log_index": data.log_index,
+        }
+        # transfer of the sale saved by the mint handler becomes the buy
+        transfer = TokenHistory.objects.filter(
             tx_hash=data.tx_hash,
-            defaults={
-                "method": "Buy",
-                "amount": data.amount,
-                "price": price,
-                "token": token,
-                "new_owner": new_owner,
-                "old_owner": old_owner,
-                "currency": currency,
+            token=token,
+            method="Transfer",
+        )
+        if not transfer.update(**fields):
+            TokenHistory.objects.bulk_create(
+                [TokenHistory(tx_hash=data.tx_hash, token=token, **fields)],
+                ignore_conflicts=True,
+            )
+
+    def rollback(self, fork_block: int) -> None:
+        """
+        Revert buys after fork_block as transfers are reverted.
+        Ownership changes of a buy with Transfer history
+        are reverted by the mint handler.
+        """
+        history = list(
+            TokenHistory.objects.filter(
+                token__collection__network=self.network,
+                token__collection__standart=self.scanner.contract_type,
+                block_number__gt=fork_block,
+                method="Buy",
+            )
+            .select_related("token__collection", "new_owner", "old_owner")
+            .order_by("-block_number", "-id")
+        )
+        if not history:
+            return
+        transfers = set(
+            TokenHistory.objects.filter(
+                tx_hash__in={record.tx_hash for record in history},
+                method="Transfer",
+            ).values_list("tx_hash", flat=True)
+        )
+        history_to_revert = [
+            record for record in history if record.tx_hash not in transfers
+        ]
+        tokens = {record.token_id: record.token for record in history_to_revert}
+        ownerships = OwnershipDelta(
+            token_ids=list(tokens),
+            owner_ids={
+                owner_id
+                for record in history_to_revert
+                for owner_id in (record.new_owner_id, record.old_owner_id)
             },
         )
+        for record in history_to_revert:
+            token = tokens[record.token_id]
+            amount = record.amount or 1
+            if token.standart == "ERC721":
+                token.owner = record.old_owner
+            # ERC721 ownership is moved only by a transfer saved before the buy
+            if ownerships.decrease(token, record.new_owner, amount):
+                ownerships.increase(token, record.old_owner, amount)
+
+        Token.objects.bulk_update(tokens.values(), ["owner"])
+        TokenHistory.objects.filter(id__in=[record.id for record in history]).delete()
+        ownerships.save()
+        self.logger.info(f"Rolled back {len(history)} buys")
 
 
 class HandlerApproveBet(HandlerABC):
@@ -451,3 +863,14 @@ class HandlerApproveBet(HandlerABC):
                     price=item.amount,
                     date=item.created_at,
                 )
+
+
+HANDLERS = {
+    handler.TYPE: handler
+    for handler in (
+        HandlerDeploy,
+        HandlerMintTransferBurn,
+        HandlerBuy,
+        HandlerApproveBet,
+    )
+}
@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from django.db import connections
+
+from scanners.adapters import get_adapter
+from scanners.leases import ScannerLeases
+from scanners.runtime import ScannerRuntime
+from scanners.scanners import (
+    HandlerApproveBet,
+    HandlerBuy,
+    HandlerDeploy,
+    HandlerMintTransferBurn,
+    ScannerAbsolute,
+)
+from src.networks.models import Network
+from src.rates.models import UsdRate
+from src.settings import config
+
+
+def plan_scanners() -> List[ScannerAbsolute]:
+    """
+    Return scanners of all networks: buy and deploy scanners per standart,
+    approve scanners per currency token, one mint scanner per network.
+    """
+    scanners = []
+    networks = Network.objects.all()
+    for network in networks:
+        get_adapter(network.network_type)  # fail early on unsupported networks
+        for standart in ["ERC721", "ERC1155"]:
+            scanners.append(
+                ScannerAbsolute(
+                    network=network,
+                    handler=HandlerBuy,
+                    contract_type=standart,
+                )
+            )
+            scanners.append(
+                ScannerAbsolute(
+                    network=network,
+                    handler=HandlerDeploy,
+                    contract_type=standart,
+                )
+            )
+
+    rates = UsdRate.objects.exclude(
+        address="0xEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEEE"
+    ).select_related("network")
+    for rate in rates:
+        scanners.append(
+            ScannerAbsolute(
+                network=rate.network,
+                handler=HandlerApproveBet,
+                contract=rate.network.get_token_contract(rate.address),
+            )
+        )
+
+    # collections committed later join the mint scanner on the next poll
+    for network in networks:
+        scanners.append(
+            ScannerAbsolute(
+                network=network,
+                handler=HandlerMintTransferBurn,
+                contract=get_adapter(network.network_type).mint_contract(network),
+            )
+        )
+    return scanners
+
+
+def shard_scanners(
+    scanners: List[ScannerAbsolute], shards: int
+) -> List[List[ScannerAbsolute]]:
+    """
+    Split scanners to shards by network, so scanners of a network share
+    connections and cached heads of one process. Largest networks go first
+    to the least loaded shard.
+    """
+    networks: Dict[int, List[ScannerAbsolute]] = defaultdict(list)
+    for scanner in scanners:
+        networks[scanner.network.id].append(scanner)
+    result = [[] for _ in range(shards)]
+    for network_scanners in sorted(networks.values(), key=len, reverse=True):
+        min(result, key=len).extend(network_scanners)
+    return [shard for shard in result if shard]
+
+
+def run_shard(index: int, scanners: List[ScannerAbsolute]) -> None:
+    logging.info(
+        f"Scanner shard {index}: "
+        + ", ".join(scanner.block_name for scanner in scanners)
+    )
+    get_runtime(scanners).run()
+
+
+def get_runtime(scanners: List[ScannerAbsolute]) -> ScannerRuntime:
+    leases = None
+    if config.SCANNER_LEASES:
+        # created in the worker, leases are held by a process
+        leases = ScannerLeases([scanner.block_name for scanner in scanners])
+    return ScannerRuntime(scanners, leases)
+
+
+class Supervisor:
+    """
+    Plan scanners of all networks and run them in worker processes,
+    one event loop per process. Dead workers are restarted.
+    Without leases scanners are sharded by network between workers,
+    with leases every worker claims its share of all scanners, so
+    processes of several hosts split the work and take over units of dead ones.
+    """
+
+    RESTART_PAUSE = 10  # seconds
+
+    def __init__(self, processes: int = 1) -> None:
+        self.processes = max(processes, 1)
+
+    def run(self) -> None:
+        scanners = plan_scanners()
+        if self.processes == 1:
+            get_runtime(scanners).run()
+            return
+
+        if config.SCANNER_LEASES:
+            shards = [scanners] * self.processes
+        else:
+            shards = shard_scanners(scanners, self.processes)
+        # forked workers must not share database connections of the supervisor
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = {index: None for index in range(len(shards))}
+        while True:
+            for index, worker in workers.items():
+                if worker is not None and worker.is_alive():
+                    continue
+                if worker is not None:
+                    logging.error(
+                        f"Scanner shard {index} exited with {worker.exitcode}"
+                    )
+                workers[index] = context.Process(
+                    target=run_shard,
+                    args=(index, shards[index]),
+                    name=f"scanner_shard_{index}",
+                )
+                workers[index].start()
+            time.sleep(self.RESTART_PAUSE)
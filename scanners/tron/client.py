@@ -0,0 +1,176 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+import httpx
+
+from src.networks.providers import EndpointPool
+from src.networks.registry import registry
+from src.settings import config
+
+
+class BlockTimestamps:
+    """LRU of block timestamps shared by Tron scanners of all networks"""
+
+    MAX_SIZE = 4096
+
+    def __init__(self) -> None:
+        self._timestamps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, network_id: int, number: int):
+        with self._lock:
+            timestamp = self._timestamps.get((network_id, number))
+            if timestamp is not None:
+                self._timestamps.move_to_end((network_id, number))
+            return timestamp
+
+    def set(self, network_id: int, number: int, timestamp: int) -> None:
+        with self._lock:
+            self._timestamps[(network_id, number)] = timestamp
+            if len(self._timestamps) > self.MAX_SIZE:
+                self._timestamps.popitem(last=False)
+
+
+block_timestamps = BlockTimestamps()
+
+
+class TronEventClient:
+    """
+    Tron event server client. Events of several contracts are requested
+    concurrently with one persistent HTTP session, all pages are followed
+    by fingerprint.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, network) -> None:
+        self.network = network
+        # private loop of the synchronous get_events, created on first use
+        self.loop = None
+        self.session = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the private loop with the session bound to it"""
+        if self.loop is None:
+            return
+        if self.session is not None:
+            self.loop.run_until_complete(self.session.aclose())
+            self.session = None
+        self.loop.close()
+        self.loop = None
+
+    def get_session(self) -> httpx.AsyncClient:
+        if self.session is None:
+            self.session = httpx.AsyncClient(
+                timeout=config.RPC_TIMEOUT or 10,
+                headers={"Accept": "application/json"},
+            )
+        return self.session
+
+    async def get_pool(self) -> EndpointPool:
+        connection = registry.get_cached(self.network)
+        if connection is None:
+            # providers are read from db, queries are not allowed on the event loop
+            loop = asyncio.get_running_loop()
+            connection = await loop.run_in_executor(None, registry.get, self.network)
+        return connection.pool
+
+    async def request(self, method: str, path: str, **kwargs) -> dict:
+        session = self.get_session()
+
+        async def send(endpoint):
+            response = await session.request(method, endpoint + path, **kwargs)
+            response.raise_for_status()
+            return response.json()
+
+        pool = await self.get_pool()
+        return await pool.request_async(send)
+
+    async def get_block_timestamp(self, number: int) -> int:
+        timestamp = block_timestamps.get(self.network.id, number)
+        if timestamp is None:
+            block = await self.request(
+                "POST", "/wallet/getblockbynum", json={"num": number}
+            )
+            timestamp = block["block_header"]["raw_data"]["timestamp"]
+            block_timestamps.set(self.network.id, number, timestamp)
+        return timestamp
+
+    async def get_contract_events(
+        self,
+        address: str,
+        event_name: str,
+        min_timestamp: int,
+        max_timestamp: int,
+    ) -> List[dict]:
+        params = {
+            "event_name": event_name,
+            "min_block_timestamp": min_timestamp,
+            "max_block_timestamp": max_timestamp,
+            "order_by": "block_timestamp,asc",
+            "limit": self.PAGE_SIZE,
+        }
+        events = []
+        while True:
+            page = await self.request(
+                "GET", f"/v1/contracts/{address}/events", params=params
+            )
+            events += page["data"]
+            fingerprint = page.get("meta", {}).get("fingerprint")
+            if not fingerprint:
+                return events
+            params["fingerprint"] = fingerprint
+
+    async def fetch_events(
+        self,
+        queries: Iterable[Tuple[str, str]],
+        from_block: int,
+        to_block: int,
+    ) -> List[dict]:
+        min_timestamp, max_timestamp = await asyncio.gather(
+            self.get_block_timestamp(from_block),
+            self.get_block_timestamp(to_block),
+        )
+        results = await asyncio.gather(
+            *(
+                self.get_contract_events(
+                    address, event_name, min_timestamp, max_timestamp
+                )
+                for address, event_name in queries
+            )
+        )
+        return [event for events in results for event in events]
+
+    def get_events(
+        self,
+        queries: Iterable[Tuple[str, str]],
+        from_block: int,
+        to_block: int,
+    ) -> List[dict]:
+        """
+        Return events of (contract address, event name) queries in block range.
+        Runs on the event loop of the client, so a client is used by one thread.
+        """
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(
+            self.fetch_events(queries, from_block, to_block)
+        )
+
+
+_clients = threading.local()
+
+
+def get_event_client(network) -> TronEventClient:
+    """Return event client of the network owned by the current thread"""
+    if not hasattr(_clients, "by_network"):
+        _clients.by_network = {}
+    client = _clients.by_network.get(network.id)
+    if client is None:
+        client = _clients.by_network[network.id] = TronEventClient(network)
+    return client
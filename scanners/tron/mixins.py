@@ -1,10 +1,8 @@
-import requests
-
 from scanners.base import ApproveData, BuyData, DeployData, MintData
 
 
 class DeployMixin:
-    def get_events_deploy(self, last_checked_block, last_network_block):
+    def get_queries_deploy(self):
         type_match = {
             "ERC721": ["fabric721_address", "ERC721Made"],
             "ERC1155": ["fabric1155_address", "ERC1155Made"],
@@ -12,14 +10,14 @@ class DeployMixin:
         collection_data = type_match[self.contract_type]
         collection_address = getattr(self.network, collection_data[0])
         event_name = collection_data[1]
-        url = self.build_tronapi_url(
+        return [(collection_address, event_name)]
+
+    def get_events_deploy(self, last_checked_block, last_network_block):
+        return self.get_contract_events(
+            self.get_queries_deploy(),
             last_checked_block,
             last_network_block,
-            collection_address,
-            event_name,
         )
-        events = requests.get(url).json()["data"]
-        return events
 
     def parse_data_deploy(self, event) -> DeployData:
         return DeployData(
@@ -30,7 +28,7 @@ class DeployMixin:
 
 
 class BuyMixin:
-    def get_events_buy(self, last_checked_block, last_network_block):
+    def get_queries_buy(self):
         type_match = {
             "ERC721": ["exchange_address", "ExchangeMadeErc721"],
             "ERC1155": ["exchange_address", "ExchangeMadeErc1155"],
@@ -38,14 +36,14 @@ class BuyMixin:
         collection_data = type_match[self.contract_type]
         collection_address = getattr(self.network, collection_data[0])
         event_name = collection_data[1]
-        url = self.build_tronapi_url(
+        return [(collection_address, event_name)]
+
+    def get_events_buy(self, last_checked_block, last_network_block):
+        return self.get_contract_events(
+            self.get_queries_buy(),
             last_checked_block,
             last_network_block,
-            collection_address,
-            event_name,
         )
-        events = requests.get(url).json()["data"]
-        return events
 
     def parse_data_buy(self, event) -> BuyData:
         return BuyData(
@@ -59,22 +57,21 @@ class BuyMixin:
             collection_address=self.to_tron_address(
                 event["result"]["sellTokenAddress"]
             ).lower(),
+            block_number=event["block_number"],
+            log_index=event.get("event_index"),
         )
 
 
 class ApproveMixin:
+    def get_queries_approve(self):
+        return [(self.contract.address, "Approval")]
+
     def get_events_approve(self, last_checked_block, last_network_block):
-        collection_address = self.contract.address
-        event_name = "Approval"
-        url = self.build_tronapi_url(
+        return self.get_contract_events(
+            self.get_queries_approve(),
             last_checked_block,
             last_network_block,
-            collection_address,
-            event_name,
         )
-        events = requests.get(url).json()["data"]
-
-        return events
 
     def parse_data_approve(self, event) -> ApproveData:
         return ApproveData(
@@ -85,18 +82,18 @@ class ApproveMixin:
 
 
 class MintMixin:
+    def get_queries_mint(self):
+        return [
+            (self.contract, event_name)
+            for event_name in ("ERC721Transfer", "ERC1155TransferSingle")
+        ]
+
     def get_events_mint(self, last_checked_block, last_network_block):
-        collection_address = self.contract
-        events = []
-        for event_name in ("ERC721Transfer", "ERC1155TransferSingle"):
-            url = self.build_tronapi_url(
-                last_checked_block,
-                last_network_block,
-                collection_address,
-                event_name,
-            )
-            events += requests.get(url).json()["data"]
-        return events
+        return self.get_contract_events(
+            self.get_queries_mint(),
+            last_checked_block,
+            last_network_block,
+        )
 
     def parse_data_mint(self, event) -> MintData:
         result = event["result"]
@@ -110,4 +107,6 @@ class MintMixin:
             tx_hash=event["transaction_id"],
             amount=result.get("value", 1),
             contract=self.to_tron_address(result["token"]).lower(),
+            block_number=event["block_number"],
+            log_index=event.get("event_index"),
         )
@@ -1,7 +1,7 @@
-from tronapi import HttpProvider, Tron
-
 from scanners.base import ScannerABC
+from scanners.tron.client import get_event_client
 from scanners.tron.mixins import ApproveMixin, BuyMixin, DeployMixin, MintMixin
+from src.networks.addresses import hex_to_tron
 
 
 class Scanner(
@@ -13,34 +13,37 @@ class Scanner(
 ):
     EMPTY_ADDRESS = "t9yd14nj9j7xab4dbgeix9h8unkkhxuwwb"
 
-    def get_tron_instance(self):
-        provider = HttpProvider(self.network.endpoint())
-        return Tron(
-            full_node=provider,
-            solidity_node=provider,
-            event_server=provider,
+    def get_contract_events(self, queries, last_checked_block, last_network_block):
+        """Fetch events of (contract address, event name) queries concurrently"""
+        events = get_event_client(self.network).get_events(
+            queries,
+            last_checked_block,
+            last_network_block,
         )
-
-    def build_tronapi_url(
-        self, last_checked_block, last_network_block, collection_address, event_name
-    ):
-        last_checked_block_timestamp = self.get_block_timestamp(last_checked_block)
-        last_network_block_timestamp = self.get_block_timestamp(last_network_block)
-        url = (
-            f"{self.network.endpoint()}/v1/contracts/{collection_address}/events?event_name={event_name}"
-            f"&min_block_timestamp={last_checked_block_timestamp}"
-            f"&max_block_timestamp={last_network_block_timestamp}"
+        return sorted(events, key=self.get_event_position)
+
+    async def get_events_async(
+        self, handler_type, last_checked_block, last_network_block, executor=None
+    ) -> list:
+        """Await events on the running loop with the async event client"""
+        events = await get_event_client(self.network).fetch_events(
+            getattr(self, f"get_queries_{handler_type}")(),
+            last_checked_block,
+            last_network_block,
         )
-        return url
-
-    def get_block_timestamp(self, number):
-        tron = self.get_tron_instance()
-        return tron.trx.get_block(number)["block_header"]["raw_data"]["timestamp"]
+        return sorted(events, key=self.get_event_position)
 
     def get_last_network_block(self):
-        tron = self.get_tron_instance()
-        return tron.trx.get_block("latest")["block_header"]["raw_data"]["number"]
+        block = self.network.endpoint_post("/wallet/getnowblock", {})
+        return block["block_header"]["raw_data"]["number"]
+
+    def get_block_hash(self, number: int) -> str:
+        return self.network.endpoint_post("/wallet/getblockbynum", {"num": number})[
+            "blockID"
+        ]
 
     def to_tron_address(self, address):
-        tron = Tron()
-        return tron.address.from_hex(address.replace("0x", "41")).decode()
+        return hex_to_tron(address)
+
+    def get_event_position(self, event) -> tuple:
+        return event["block_number"], event.get("event_index", 0)
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AccountConfig(AppConfig):
@@ -6,3 +7,6 @@ class AccountConfig(AppConfig):
 
     def ready(self):
         from . import signals
+        from .services.owners import fill_username_lower
+
+        post_migrate.connect(fill_username_lower, sender=self)
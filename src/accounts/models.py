@@ -1,4 +1,6 @@
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db.models import Q
@@ -38,6 +40,10 @@ class AdvUserManager(UserManager):
 
 
 class AdvUser(AbstractUser):
+    # lowercase username (address), filled on save, scanners look up owners by it
+    username_lower = models.CharField(
+        max_length=150, null=True, default=None, blank=True, db_index=True
+    )
     avatar_ipfs = models.CharField(max_length=200, null=True, default=None)
     cover_ipfs = models.CharField(max_length=200, null=True, default=None, blank=True)
     display_name = models.CharField(max_length=50, default=None, null=True, blank=True)
@@ -51,9 +57,21 @@ class AdvUser(AbstractUser):
     site = models.CharField(max_length=200, default=None, null=True, blank=True)
     is_verificated = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # full-text search, rebuilt by post_save signal and update_search_vectors command
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = AdvUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(fields=["search_vector"], name="user_search_vector"),
+            GinIndex(
+                fields=["display_name"],
+                opclasses=["gin_trgm_ops"],
+                name="user_display_name_trgm",
+            ),
+        ]
+
     def get_name(self):
         return self.display_name if self.display_name else self.username
 
@@ -0,0 +1,109 @@
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from src.accounts.models import AdvUser, DefaultAvatar
+
+
+class OwnersCache:
+    """Process-local LRU of user ids by lowercase address"""
+
+    MAX_SIZE = 100_000
+
+    def __init__(self) -> None:
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, address: str) -> Optional[int]:
+        with self._lock:
+            user_id = self._ids.get(address)
+            if user_id is not None:
+                self._ids.move_to_end(address)
+            return user_id
+
+    def set(self, address: str, user_id: int) -> None:
+        with self._lock:
+            self._ids[address] = user_id
+            self._ids.move_to_end(address)
+            if len(self._ids) > self.MAX_SIZE:
+                self._ids.popitem(last=False)
+
+    def update(self, ids: Dict[str, int]) -> None:
+        for address, user_id in ids.items():
+            self.set(address, user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+owners_cache = OwnersCache()
+
+
+def get_or_create_owners(addresses: Iterable[str]) -> Dict[str, int]:
+    """
+    Return user ids by lowercase addresses. Ids are taken from the cache,
+    then by indexed username_lower, missing users are created with one bulk_create.
+    """
+    addresses_lower = {}
+    for address in addresses:
+        addresses_lower.setdefault(address.lower(), address)
+    addresses = addresses_lower
+    owners = {}
+    for address in addresses:
+        user_id = owners_cache.get(address)
+        if user_id is not None:
+            owners[address] = user_id
+
+    missing = addresses.keys() - owners.keys()
+    found = {}
+    if missing:
+        found.update(
+            AdvUser.objects.filter(username_lower__in=missing).values_list(
+                "username_lower", "id"
+            )
+        )
+        missing -= found.keys()
+    if missing:
+        found.update(create_owners([addresses[address] for address in missing]))
+    owners.update(found)
+
+    # ids of a rolled back transaction are not cached
+    transaction.on_commit(lambda: owners_cache.update(found))
+    return owners
+
+
+def fill_username_lower(**kwargs) -> int:
+    """
+    Fill username_lower of users saved before it was added,
+    runs after migrate, so owners are always found by the index.
+    """
+    return AdvUser.objects.filter(username_lower__isnull=True).update(
+        username_lower=Lower("username")
+    )
+
+
+def create_owners(addresses: List[str]) -> Dict[str, int]:
+    # bulk_create skips post_save signal, which sets default avatar
+    default_avatars = list(DefaultAvatar.objects.values_list("image", flat=True))
+    users = [
+        AdvUser(
+            username=address,
+            username_lower=address.lower(),
+            avatar_ipfs=random.choice(default_avatars) if default_avatars else None,
+        )
+        for address in addresses
+    ]
+    for user in users:
+        user.set_unusable_password()
+    AdvUser.objects.bulk_create(users, ignore_conflicts=True)
+    # ids are not returned with ignore_conflicts, users created in parallel are found too
+    return dict(
+        AdvUser.objects.filter(
+            username_lower__in=[user.username_lower for user in users]
+        ).values_list("username_lower", "id")
+    )
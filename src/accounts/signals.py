@@ -1,14 +1,28 @@
 import random
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 
 from src.accounts.models import AdvUser, DefaultAvatar
+from src.store.services.full_text import remember_search_text, update_search_vector
+
+
+@receiver(pre_save, sender=AdvUser)
+def adv_user_pre_save_dispatcher(sender, instance, *args, **kwargs):
+    set_username_lower(instance)
 
 
 @receiver(post_save, sender=AdvUser)
-def adv_user_post_save_dispatcher(sender, instance, created, *args, **kwargs):
+def adv_user_post_save_dispatcher(
+    sender, instance, created, update_fields=None, *args, **kwargs
+):
     set_default_avatar(instance, created)
+    update_search_vector(instance, created, update_fields)
+
+
+@receiver(post_init, sender=AdvUser)
+def adv_user_post_init_dispatcher(sender, instance, *args, **kwargs):
+    remember_search_text(instance)
 
 
 def set_default_avatar(adv_user, created):
@@ -20,3 +34,10 @@ def set_default_avatar(adv_user, created):
         if default_avatars:
             adv_user.avatar_ipfs = random.choice(default_avatars)
             adv_user.save()
+
+
+def set_username_lower(adv_user):
+    """
+    Keep lowercase username used for owner lookups by address.
+    """
+    adv_user.username_lower = adv_user.username.lower() if adv_user.username else None
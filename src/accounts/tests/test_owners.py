@@ -0,0 +1,32 @@
+import pytest
+
+from src.accounts.models import AdvUser
+from src.accounts.services.owners import (
+    fill_username_lower,
+    get_or_create_owners,
+    owners_cache,
+)
+
+
+@pytest.mark.django_db
+def test_get_or_create_owners(mixer):
+    owners_cache.clear()
+    user = mixer.blend("accounts.AdvUser", username="0xAbC")
+    assert user.username_lower == "0xabc"
+
+    owners = get_or_create_owners(["0xABC", "0xDef", "0xdef"])
+    assert owners["0xabc"] == user.id
+    assert AdvUser.objects.get(id=owners["0xdef"]).username == "0xDef"
+    assert AdvUser.objects.filter(username_lower="0xdef").count() == 1
+    assert owners_cache.get("0xdef") == owners["0xdef"]
+
+
+@pytest.mark.django_db
+def test_fill_username_lower(mixer):
+    """Users saved before username_lower was added are found after migrate"""
+    owners_cache.clear()
+    user = mixer.blend("accounts.AdvUser", username="0xAbC")
+    AdvUser.objects.filter(id=user.id).update(username_lower=None)
+
+    assert fill_username_lower() == 1
+    assert get_or_create_owners(["0xabc"]) == {"0xabc": user.id}
@@ -9,6 +9,8 @@ from tronapi import Tron
 from tronapi.common.account import Account
 from web3 import Web3
 
+from src.networks.addresses import hex_to_tron
+
 
 def valid_metamask_message(address, message, signature):
     try:
@@ -41,7 +43,7 @@ def valid_metamask_message(address, message, signature):
         )
         signer_address = Account.recover_hash(message_hash_keccak.hex(), signature)
         tron_address = "41" + signer_address[2:]
-        signer_address = tron.address.from_hex(tron_address).decode()
+        signer_address = hex_to_tron(tron_address)
 
         logging.info(f"matching {signer_address}, {address}")
 
@@ -246,8 +246,8 @@ class GetUserCollections(APIView, PaginateMixin):
         collections = Collection.objects.committed().user_collections(
             request.user, network=network
         )
-        collections = UserCollectionSerializer(collections, many=True).data
-        return Response(self.paginate(request, collections), status=status.HTTP_200_OK)
+        response = self.paginate(request, collections, UserCollectionSerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class GetFollowingView(APIView, PaginateMixin):
@@ -269,8 +269,8 @@ class GetFollowingView(APIView, PaginateMixin):
 
         follow_queryset = UserAction.objects.filter(method="follow", user=user)
         followed_users = [action.whom_follow for action in follow_queryset]
-        users = FollowingSerializer(followed_users, many=True).data
-        return Response(self.paginate(request, users), status=status.HTTP_200_OK)
+        response = self.paginate(request, followed_users, FollowingSerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class GetFollowersView(APIView, PaginateMixin):
@@ -292,8 +292,8 @@ class GetFollowersView(APIView, PaginateMixin):
 
         follow_queryset = UserAction.objects.filter(method="follow", whom_follow=user)
         followers_users = [action.user for action in follow_queryset]
-        users = FollowingSerializer(followers_users, many=True).data
-        return Response(self.paginate(request, users), status=status.HTTP_200_OK)
+        response = self.paginate(request, followers_users, FollowingSerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class VerificationView(APIView):
@@ -78,6 +78,21 @@ class TokenHistory(models.Model):
     currency = models.ForeignKey(
         "rates.UsdRate", on_delete=models.PROTECT, null=True, default=None, blank=True
     )
+    # block of the event, used to roll back history on chain reorganization
+    block_number = models.PositiveBigIntegerField(
+        default=None, blank=True, null=True, db_index=True
+    )
+    # index of the event log in the transaction, history of an event is saved once
+    log_index = models.PositiveIntegerField(default=None, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tx_hash", "log_index"],
+                condition=models.Q(log_index__isnull=False),
+                name="unique_token_history_event",
+            ),
+        ]
 
 
 class BidsHistory(models.Model):
@@ -1,12 +1,13 @@
 import json
 from datetime import date, timedelta
 
-from django.db.models import Count, F, Sum
+from django.db.models import Count, F, Min, Sum
 
 from src.activity.models import CollectionStat, TokenHistory
 from src.settings import config
 from src.store.models import Collection
 from src.store.serializers import CollectionSlimSerializer
+from src.store.services.usd_prices import stored_usd_price
 from src.utilities import RedisClient, get_periods
 
 
@@ -100,12 +101,12 @@ def get_top_collections(network, period, order_by, tag=None):
         )
         collection_object = Collection.objects.get(id=collection["collection"])
         collection["collection"] = CollectionSlimSerializer(collection_object).data
-        tokens = collection_object.token_set.filter(
+        floor_price = collection_object.token_set.filter(
             selling=True,
             currency_price__isnull=False,
-        )
-        token_prices = [token.usd_price for token in tokens]
-        collection["floor_price"] = min(token_prices) if token_prices else None
+        ).aggregate(floor_price=Min(stored_usd_price()))["floor_price"]
+        # cached as json, price stays a number
+        collection["floor_price"] = float(floor_price) if floor_price else None
         collection["total_items"] = collection_object.token_set.count()
 
         owner_value = "owner" if collection_object.standart == "ERC721" else "owners"
@@ -38,8 +38,8 @@ class ActivityView(APIView, PaginateMixin):
         types = request.query_params.get("type")
 
         activities = Activity(network=network, types=types.split(",")).get_activity()
-        items = ActivitySerializer(activities, many=True).data
-        return Response(self.paginate(request, items), status=status.HTTP_200_OK)
+        response = self.paginate(request, activities, ActivitySerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class NotificationActivityView(APIView):
@@ -191,8 +191,8 @@ class UserActivityView(APIView, PaginateMixin):
             user=address,
         ).get_activity()
 
-        items = ActivitySerializer(activities, many=True).data
-        return Response(self.paginate(request, items), status=status.HTTP_200_OK)
+        response = self.paginate(request, activities, ActivitySerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class FollowingActivityView(APIView, PaginateMixin):
@@ -225,8 +225,8 @@ class FollowingActivityView(APIView, PaginateMixin):
             following_ids=following_ids,
         ).get_activity()
 
-        items = ActivitySerializer(activities, many=True).data
-        return Response(self.paginate(request, items), status=status.HTTP_200_OK)
+        response = self.paginate(request, activities, ActivitySerializer)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class GetTopCollectionsView(APIView, PaginateMixin):
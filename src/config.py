@@ -38,6 +38,17 @@ class Config:
     IPFS_CLIENT: str
     IPFS_DOMAIN: str
     SCANNER_SLEEP: int
+    SCANNER_HEAD_TTL: Optional[int]
+    SCANNER_RPC_WORKERS: Optional[int]
+    SCANNER_DB_WORKERS: Optional[int]
+    SCANNER_QUEUE: Optional[bool]
+    SCANNER_WRITERS: Optional[int]
+    SCANNER_PROCESSES: Optional[int]
+    SCANNER_LEASES: Optional[bool]
+    SCANNER_LEASE_TTL: Optional[int]
+    SCANNER_METRICS_TOKEN: Optional[str]
+    RPC_TIMEOUT: Optional[int]
+    RPC_BALANCING: Optional[str]
     ORACLE_ADDRESS: str
 
     @dataclass
@@ -0,0 +1,80 @@
+"""
+Address codec of supported networks: base58check Tron addresses,
+hex addresses and EIP-55 checksums. Results are cached, so repeated
+conversions of the same addresses in scanners and tasks are dict lookups.
+"""
+from functools import lru_cache
+from hashlib import sha256
+
+from eth_utils import keccak
+
+ADDRESS_CACHE_SIZE = 65536
+TRON_PREFIX = "41"
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+
+def _double_sha256(data: bytes) -> bytes:
+    return sha256(sha256(data).digest()).digest()
+
+
+def b58encode_check(data: bytes) -> str:
+    data += _double_sha256(data)[:4]
+    number = int.from_bytes(data, "big")
+    chars = []
+    while number:
+        number, remainder = divmod(number, 58)
+        chars.append(BASE58_ALPHABET[remainder])
+    leading_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * leading_zeros + "".join(reversed(chars))
+
+
+def b58decode_check(address: str) -> bytes:
+    number = 0
+    for char in address:
+        try:
+            number = number * 58 + BASE58_INDEX[char]
+        except KeyError:
+            raise ValueError(f"Invalid base58 address {address}")
+    leading_zeros = len(address) - len(address.lstrip("1"))
+    data = b"\0" * leading_zeros + number.to_bytes(
+        (number.bit_length() + 7) // 8, "big"
+    )
+    data, checksum = data[:-4], data[-4:]
+    if _double_sha256(data)[:4] != checksum:
+        raise ValueError(f"Invalid checksum of address {address}")
+    return data
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def to_checksum_address(address: str) -> str:
+    """Return EIP-55 checksum address of 0x prefixed hex address"""
+    address = address.lower().replace("0x", "")
+    if len(address) != 40:
+        raise ValueError(f"Invalid address 0x{address}")
+    address_hash = keccak(text=address).hex()
+    return "0x" + "".join(
+        char.upper() if int(address_hash[index], 16) >= 8 else char
+        for index, char in enumerate(address)
+    )
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def tron_to_hex(address: str) -> str:
+    """Return 41 prefixed hex of base58, 41 or 0x prefixed Tron address"""
+    if address.startswith("0x"):
+        return TRON_PREFIX + address[2:].lower()
+    if address.startswith(TRON_PREFIX) and len(address) == 42:
+        return address.lower()
+    return b58decode_check(address).hex()
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def hex_to_tron(address: str) -> str:
+    """Return base58 Tron address of 41 or 0x prefixed hex address"""
+    return b58encode_check(bytes.fromhex(tron_to_hex(address)))
+
+
+def tron_to_ethereum(address: str) -> str:
+    """Return checksum 0x address of Tron address, used by ABI encoding"""
+    return to_checksum_address("0x" + tron_to_hex(address)[2:])
@@ -46,6 +46,16 @@ class NetworkAdmin(admin.ModelAdmin):
                 ),
             },
         ),
+        (
+            "Scanner",
+            {
+                "fields": (
+                    "scanner_max_range",
+                    "scanner_handler_ranges",
+                    "scanner_min_lag",
+                ),
+            },
+        ),
     )
 
 
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scanners.adapters import get_adapter
+from scanners.backfill import Backfill
+from scanners.scanners import HANDLERS, ScannerAbsolute
+from src.networks.models import Network
+
+
+class Command(BaseCommand):
+    """
+    Catch up scanner checkpoint with concurrent block range requests.
+    Stop the scanner process before running it:
+    'manage.py scanner_backfill Ethereum mint --workers 16'
+    """
+
+    help = "Fetch missed scanner events concurrently and move the checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("network", help="Network name")
+        parser.add_argument("handler", choices=list(HANDLERS))
+        parser.add_argument("--contract-type", choices=["ERC721", "ERC1155"])
+        parser.add_argument("--contract", help="Token address for approve handler")
+        parser.add_argument("--from-block", type=int)
+        parser.add_argument("--to-block", type=int)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--range", type=int, help="Blocks in one request")
+
+    def handle(self, *args, **options):
+        try:
+            network = Network.objects.get(name__iexact=options["network"])
+        except Network.DoesNotExist:
+            raise CommandError(f"Network {options['network']} not found")
+
+        handler = HANDLERS[options["handler"]]
+        contract = None
+        if options["contract"]:
+            contract = network.get_token_contract(options["contract"])
+        elif handler.TYPE == "mint":
+            contract = get_adapter(network.network_type).mint_contract(network)
+        if handler.TYPE in ("deploy", "buy") and not options["contract_type"]:
+            raise CommandError(f"--contract-type is required for {handler.TYPE}")
+
+        scanner = ScannerAbsolute(
+            network=network,
+            handler=handler,
+            contract_type=options["contract_type"],
+            contract=contract,
+        )
+        Backfill(
+            scanner,
+            workers=options["workers"],
+            range_size=options["range"],
+        ).run(options["from_block"], options["to_block"])
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from scanners.events_queue import EventWriter
+from src.settings import config
+
+
+class Command(BaseCommand):
+    """
+    Apply events queued by scanners with SCANNER_QUEUE enabled.
+    Several processes of the command can run to add writers under load.
+    """
+
+    help = "Write queued scanner events to the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=config.SCANNER_WRITERS or 4)
+
+    def handle(self, *args, **options):
+        writers = [
+            EventWriter(name=f"writer_{index}") for index in range(options["workers"])
+        ]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
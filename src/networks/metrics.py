@@ -0,0 +1,182 @@
+import time
+from typing import List
+
+from src.utilities import RedisClient
+
+SCANNERS_KEY = "scanner_metrics"
+# upper bounds of RPC latency histogram buckets, seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class ScannerMetrics:
+    """
+    Metrics of one scanner checkpoint, kept in a redis hash
+    to be read by the metrics endpoint of the API.
+    """
+
+    def __init__(self, block_name: str, network: str, handler_type: str) -> None:
+        self.block_name = block_name
+        self.network = network
+        self.handler_type = handler_type
+        self.key = f"{SCANNERS_KEY}_{block_name}"
+
+    def pipeline(self):
+        pipe = RedisClient().connection.pipeline()
+        pipe.sadd(SCANNERS_KEY, self.block_name)
+        pipe.hset(
+            self.key,
+            mapping={
+                "network": self.network,
+                "handler": self.handler_type,
+                "updated_at": time.time(),
+            },
+        )
+        return pipe
+
+    def set_head(self, network_head: int, last_block: int) -> None:
+        with self.pipeline() as pipe:
+            pipe.hset(
+                self.key,
+                mapping={
+                    "head": network_head,
+                    "last_block": last_block,
+                    "lag": max(network_head - last_block, 0),
+                },
+            )
+            pipe.execute()
+
+    def observe_range(
+        self, events_count: int, rpc_seconds: float, db_seconds: float = None
+    ) -> None:
+        """
+        Record fetched block range, db_seconds is None
+        if events are written by queue writers.
+        """
+        total_seconds = rpc_seconds + (db_seconds or 0)
+        with self.pipeline() as pipe:
+            for bucket in LATENCY_BUCKETS:
+                if rpc_seconds <= bucket:
+                    pipe.hincrby(self.key, f"rpc_bucket_{bucket}", 1)
+            pipe.hincrby(self.key, "rpc_count", 1)
+            pipe.hincrbyfloat(self.key, "rpc_sum", rpc_seconds)
+            pipe.hincrby(self.key, "events_total", events_count)
+            pipe.hset(
+                self.key,
+                "events_per_second",
+                events_count / total_seconds if total_seconds else 0,
+            )
+            if db_seconds is not None:
+                self.add_write(pipe, events_count, db_seconds)
+            pipe.execute()
+
+    def observe_write(self, events_count: int, db_seconds: float) -> None:
+        """Record events written by a queue writer"""
+        with self.pipeline() as pipe:
+            self.add_write(pipe, events_count, db_seconds)
+            pipe.execute()
+
+    def add_write(self, pipe, events_count: int, db_seconds: float) -> None:
+        pipe.hincrbyfloat(self.key, "db_seconds_total", db_seconds)
+        pipe.hset(
+            self.key,
+            "db_seconds_per_event",
+            db_seconds / events_count if events_count else 0,
+        )
+
+    def record_error(self) -> None:
+        with self.pipeline() as pipe:
+            pipe.hincrby(self.key, "errors_total", 1)
+            pipe.execute()
+
+
+def render_prometheus() -> str:
+    """Return metrics of all scanners in Prometheus text format"""
+    connection = RedisClient().connection
+    block_names = sorted(name.decode() for name in connection.smembers(SCANNERS_KEY))
+    with connection.pipeline() as pipe:
+        for block_name in block_names:
+            pipe.hgetall(f"{SCANNERS_KEY}_{block_name}")
+        scanners = pipe.execute()
+
+    samples = {
+        "scanner_lag_blocks": ("gauge", "Blocks between checkpoint and head", []),
+        "scanner_last_block": ("gauge", "Last scanned block", []),
+        "scanner_events_total": ("counter", "Processed events", []),
+        "scanner_events_per_second": (
+            "gauge",
+            "Events per second of last block range",
+            [],
+        ),
+        "scanner_rpc_latency_seconds": (
+            "histogram",
+            "Latency of events requests",
+            [],
+        ),
+        "scanner_db_write_seconds_total": ("counter", "Time of database writes", []),
+        "scanner_db_write_seconds_per_event": (
+            "gauge",
+            "Database write time per event of last block range",
+            [],
+        ),
+        "scanner_errors_total": ("counter", "Scanner errors", []),
+        "scanner_updated_timestamp_seconds": ("gauge", "Last metrics update", []),
+    }
+
+    def add(name, labels, value, suffix=""):
+        labels = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        samples[name][2].append(f"{name}{suffix}{{{labels}}} {value}")
+
+    for block_name, fields in zip(block_names, scanners):
+        fields = {key.decode(): value.decode() for key, value in fields.items()}
+        labels = {
+            "scanner": block_name,
+            "network": fields.get("network", ""),
+            "handler": fields.get("handler", ""),
+        }
+        add("scanner_lag_blocks", labels, fields.get("lag", 0))
+        add("scanner_last_block", labels, fields.get("last_block", 0))
+        add("scanner_events_total", labels, fields.get("events_total", 0))
+        add("scanner_events_per_second", labels, fields.get("events_per_second", 0))
+        for bucket in LATENCY_BUCKETS:
+            add(
+                "scanner_rpc_latency_seconds",
+                {**labels, "le": bucket},
+                fields.get(f"rpc_bucket_{bucket}", 0),
+                "_bucket",
+            )
+        add(
+            "scanner_rpc_latency_seconds",
+            {**labels, "le": "+Inf"},
+            fields.get("rpc_count", 0),
+            "_bucket",
+        )
+        add("scanner_rpc_latency_seconds", labels, fields.get("rpc_sum", 0), "_sum")
+        add(
+            "scanner_rpc_latency_seconds",
+            labels,
+            fields.get("rpc_count", 0),
+            "_count",
+        )
+        add(
+            "scanner_db_write_seconds_total",
+            labels,
+            fields.get("db_seconds_total", 0),
+        )
+        add(
+            "scanner_db_write_seconds_per_event",
+            labels,
+            fields.get("db_seconds_per_event", 0),
+        )
+        add("scanner_errors_total", labels, fields.get("errors_total", 0))
+        add(
+            "scanner_updated_timestamp_seconds",
+            labels,
+            fields.get("updated_at", 0),
+        )
+
+    lines: List[str] = []
+    for name, (metric_type, description, metric_samples) in samples.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines += metric_samples
+    return "\n".join(lines) + "\n"
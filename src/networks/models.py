@@ -1,13 +1,13 @@
 import logging
-from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List
 
-import requests
 from django.db import models
 from eth_abi import decode_abi, encode_abi
+from hexbytes import HexBytes
 from tronapi import HttpProvider, Tron
-from tronapi.common.account import Address as TronAddress
 from trx_utils import decode_hex
-from web3 import Web3
+from web3._utils.abi import get_abi_output_types
 
 from contracts import (
     ERC721_FABRIC,
@@ -17,6 +17,8 @@ from contracts import (
     EXCHANGE,
     WETH_ABI,
 )
+from src.networks.addresses import to_checksum_address, tron_to_ethereum, tron_to_hex
+from src.networks.registry import registry
 from src.networks.utils import tron_function_selector
 from src.settings import config
 
@@ -25,6 +27,10 @@ if TYPE_CHECKING:
     from web3.types import ABI
 
 
+RPC_BATCH_SIZE = 100
+TRON_READ_WORKERS = 8
+
+
 class Types(models.TextChoices):
     ethereum = "ethereum"
     tron = "tron"
@@ -55,10 +61,28 @@ class Network(models.Model):
         choices=Types.choices,
         default=Types.ethereum,
     )
+    scanner_max_range = models.PositiveIntegerField(
+        default=4990,
+        help_text="Max blocks in one scanner request",
+    )
+    scanner_handler_ranges = models.JSONField(
+        blank=True,
+        null=True,
+        default=None,
+        help_text='Max blocks by handler type, e.g. {"mint": 1000}',
+    )
+    scanner_min_lag = models.PositiveIntegerField(
+        default=2,
+        help_text="Scanner waits for this number of new blocks before request",
+    )
 
     def __str__(self):
         return self.name
 
+    def get_scanner_max_range(self, handler_type: str) -> int:
+        ranges = self.scanner_handler_ranges or {}
+        return int(ranges.get(handler_type, self.scanner_max_range))
+
     @property
     def ipfs_icon(self):
         if self.icon:
@@ -66,19 +90,36 @@ class Network(models.Model):
 
     @property
     def web3(self):
-        return Web3(
-            Web3.HTTPProvider(self.providers.all().values_list("endpoint", flat=True))
-        )
+        return registry.get(self).web3
 
     def endpoint(self) -> str:
         """Need for TRON methods"""
-        return self.providers.first().endpoint
+        return registry.get(self).pool.best()
+
+    def request_endpoint(self, func):
+        """Call func(endpoint) with failover between network providers"""
+        return registry.get(self).pool.request(func)
+
+    def endpoint_post(self, path: str, payload) -> dict:
+        """Post json payload to endpoint path with failover between providers"""
+        connection = registry.get(self)
+
+        def post(endpoint):
+            response = connection.session.post(
+                endpoint + path,
+                json=payload,
+                headers={"Accept": "application/json"},
+                timeout=config.RPC_TIMEOUT or 10,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return connection.pool.request(post)
 
     def _get_contract_by_abi(self, abi: "ABI", address: str = None) -> "Contract":
         if address:
             address = self.wrap_in_checksum(address)
-        contract = self.web3.eth.contract(address=address, abi=abi)
-        return contract
+        return registry.get(self).get_contract(abi, address)
 
     def get_exchange_contract(self) -> "Contract":
         return self._get_contract_by_abi(EXCHANGE, self.exchange_address)
@@ -112,13 +153,13 @@ class Network(models.Model):
 
     def get_ethereum_address(self, address):
         if self.network_type == Types.tron:
-            return self.web3.toChecksumAddress("0x" + TronAddress.to_hex(address)[2:])
-        return self.web3.toChecksumAddress(address)
+            return tron_to_ethereum(address)
+        return to_checksum_address(address)
 
     def wrap_in_checksum(self, address: str) -> str:
         """Wrap address to checksum because calling web3 for tron will return an error"""
         if self.network_type == Types.ethereum:
-            return self.web3.toChecksumAddress(address)
+            return to_checksum_address(address)
         return address
 
     def contract_call(self, method_type: str, **kwargs):
@@ -139,21 +180,86 @@ class Network(models.Model):
             **kwargs
         )
 
+    def contract_call_many(self, calls: List[dict]) -> list:
+        """
+        Execute many read methods with few requests, results are in order of calls.
+        Every call is a dict of contract_call kwargs for read method.
+        Result of a failed call is None, so one revert does not fail the batch.
+        """
+        if not calls:
+            return []
+        return getattr(self, f"execute_{self.network_type}_read_many")(calls)
+
+    def _get_read_contract(self, contract_type: str, address: str) -> "Contract":
+        # don't like this if-else , TODO refactor
+        if contract_type in ("exchange", "erc721fabric", "erc1155fabric"):
+            return getattr(self, f"get_{contract_type}_contract")()
+        return getattr(self, f"get_{contract_type}_contract")(address)
+
     def execute_ethereum_read_method(self, **kwargs):
         contract_type = kwargs.get("contract_type")
         address = kwargs.get("address")
         function_name = kwargs.get("function_name")
         input_params = kwargs.get("input_params")
-        # don't like this if-else , TODO refactor
-        if contract_type in ("exchange", "erc721fabric", "erc1155fabric"):
-            contract = getattr(self, f"get_{contract_type}_contract")()
-        else:
-            contract = getattr(self, f"get_{contract_type}_contract")(address)
+        contract = self._get_read_contract(contract_type, address)
         # to not send None into function args
         if input_params:
             return getattr(contract.functions, function_name)(*input_params).call()
         return getattr(contract.functions, function_name)().call()
 
+    def execute_ethereum_read_many(self, calls: List[dict]) -> list:
+        """Send eth_call requests in JSON-RPC batches of RPC_BATCH_SIZE"""
+        prepared = []
+        for call in calls:
+            contract = self._get_read_contract(
+                call.get("contract_type"),
+                call.get("address"),
+            )
+            function_name = call.get("function_name")
+            function_abi = contract.get_function_by_name(function_name).abi
+            data = contract.encodeABI(
+                fn_name=function_name,
+                args=call.get("input_params") or (),
+            )
+            tx = {"to": contract.address, "data": data}
+            prepared.append((tx, get_abi_output_types(function_abi)))
+
+        codec = self.web3.codec
+        results = []
+        for i in range(0, len(prepared), RPC_BATCH_SIZE):
+            chunk = prepared[i : i + RPC_BATCH_SIZE]
+            payload = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": id_,
+                    "method": "eth_call",
+                    "params": [tx, "latest"],
+                }
+                for id_, (tx, _) in enumerate(chunk)
+            ]
+            responses = self.endpoint_post("", payload)
+            if not isinstance(responses, list):
+                raise ValueError(f"Batch request failed: {responses}")
+            responses = {response["id"]: response for response in responses}
+            for id_, ((tx, output_types), call) in enumerate(
+                zip(chunk, calls[i : i + RPC_BATCH_SIZE])
+            ):
+                response = responses.get(id_, {"error": "no response"})
+                try:
+                    if "error" in response:
+                        raise ValueError(response["error"])
+                    result = codec.decode_abi(
+                        output_types, HexBytes(response["result"])
+                    )
+                except Exception as e:
+                    logging.warning(
+                        f"{call.get('function_name')} of {tx['to']} failed: {e}"
+                    )
+                    results.append(None)
+                    continue
+                results.append(result[0] if len(result) == 1 else list(result))
+        return results
+
     def execute_ethereum_write_method(self, **kwargs):
         contract_type = kwargs.get("contract_type")
         address = kwargs.get("address")
@@ -171,13 +277,14 @@ class Network(models.Model):
         assert gas_limit is not None
         assert nonce_username is not None
 
+        web3 = self.web3
         tx_params = {
-            "chainId": self.web3.eth.chainId,
+            "chainId": web3.eth.chainId,
             "gas": gas_limit,
-            "nonce": self.web3.eth.getTransactionCount(
+            "nonce": web3.eth.getTransactionCount(
                 self.wrap_in_checksum(nonce_username), "pending"
             ),
-            "gasPrice": self.web3.eth.gasPrice,
+            "gasPrice": web3.eth.gasPrice,
         }
         if tx_value is not None:
             tx_params["value"] = tx_value
@@ -194,10 +301,8 @@ class Network(models.Model):
                 tx_params
             )
         if send:
-            signed_tx = self.web3.eth.account.sign_transaction(
-                initial_tx, config.PRIV_KEY
-            )
-            tx_hash = self.web3.eth.sendRawTransaction(signed_tx.rawTransaction)
+            signed_tx = web3.eth.account.sign_transaction(initial_tx, config.PRIV_KEY)
+            tx_hash = web3.eth.sendRawTransaction(signed_tx.rawTransaction)
             return tx_hash.hex()
         return initial_tx
 
@@ -222,7 +327,7 @@ class Network(models.Model):
                     f"could not get contract address for {contract_type} in {self.name}"
                 )
                 raise "backend didn't found contract address"
-        address = TronAddress.to_hex(address)
+        address = tron_to_hex(address)
         function = tron_function_selector(function_name, input_types)
         if len(input_params) == 1:
             function = function.replace(",", "")
@@ -234,15 +339,28 @@ class Network(models.Model):
             "parameter": input_data,
         }
         logging.info(payload)
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
-        url = self.endpoint() + "/wallet/triggerconstantcontract"
-        response = requests.post(url, json=payload, headers=headers)
-        logging.info(response.json())
-        constant_result = response.json()["constant_result"][0]
+        response = self.endpoint_post("/wallet/triggerconstantcontract", payload)
+        logging.info(response)
+        constant_result = response["constant_result"][0]
         decoded_data = decode_hex(constant_result)
         result = decode_abi(output_types, decoded_data)
         return result[0]
 
+    def execute_tron_read_many(self, calls: List[dict]) -> list:
+        """Tron has no batch requests, calls are sent concurrently"""
+
+        def read(call):
+            try:
+                return self.execute_tron_read_method(**call)
+            except Exception as e:
+                logging.warning(
+                    f"{call.get('function_name')} of {call.get('address')} failed: {e}"
+                )
+                return None
+
+        with ThreadPoolExecutor(max_workers=TRON_READ_WORKERS) as executor:
+            return list(executor.map(read, calls))
+
     def execute_tron_write_method(self, **kwargs):
         input_params = kwargs.get("input_params")
         input_types = kwargs.get("input_type")
@@ -0,0 +1,177 @@
+import json
+import random
+import threading
+import time
+from itertools import count
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+import requests
+from web3 import HTTPProvider
+from web3.exceptions import BadResponseFormat
+from web3.providers.base import JSONBaseProvider
+
+from src.settings import config
+
+# errors after which the request is repeated on another provider
+FAILOVER_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.HTTPError,
+    httpx.HTTPError,
+    json.JSONDecodeError,
+    BadResponseFormat,
+)
+
+
+class EndpointState:
+    """Latency and health of one provider endpoint."""
+
+    LATENCY_WEIGHT = 0.2
+    COOLDOWN = 5
+    MAX_COOLDOWN = 300
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.latency = 0.0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def success(self, latency: float) -> None:
+        if self.latency:
+            self.latency += self.LATENCY_WEIGHT * (latency - self.latency)
+        else:
+            self.latency = latency
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def failure(self) -> None:
+        # cooldown grows with every failure in a row, the first request
+        # after cooldown works as a health check of the endpoint
+        self.failures += 1
+        cooldown = min(self.COOLDOWN * 2 ** (self.failures - 1), self.MAX_COOLDOWN)
+        self.unhealthy_until = time.monotonic() + cooldown
+
+
+class EndpointPool:
+    """
+    Provider endpoints of a network with failover and load balancing.
+    Healthy endpoints are tried first, in round-robin or least-latency order.
+    """
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_LATENCY = "least_latency"
+    # part of requests sent to a random endpoint to refresh its latency
+    EXPLORATION_RATE = 0.05
+
+    def __init__(self, endpoints: Tuple[str, ...], strategy: str = None) -> None:
+        self.endpoints = endpoints
+        self.states = {endpoint: EndpointState(endpoint) for endpoint in endpoints}
+        self.strategy = strategy or config.RPC_BALANCING or self.LEAST_LATENCY
+        self._counter = count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[str]:
+        states = list(self.states.values())
+        healthy = [state for state in states if state.is_healthy]
+        unhealthy = sorted(
+            (state for state in states if not state.is_healthy),
+            key=lambda state: state.unhealthy_until,
+        )
+        if self.strategy == self.ROUND_ROBIN or random.random() < self.EXPLORATION_RATE:
+            shift = next(self._counter) % len(healthy) if healthy else 0
+            healthy = healthy[shift:] + healthy[:shift]
+        else:
+            healthy.sort(key=lambda state: state.latency)
+        return [state.endpoint for state in healthy + unhealthy]
+
+    def best(self) -> str:
+        return self.candidates()[0]
+
+    def report_success(self, endpoint: str, latency: float) -> None:
+        with self._lock:
+            self.states[endpoint].success(latency)
+
+    def report_failure(self, endpoint: str) -> None:
+        with self._lock:
+            self.states[endpoint].failure()
+
+    def request(self, func: Callable[[str], object]):
+        """Call func(endpoint) on endpoints one by one until it succeeds."""
+        error = None
+        for endpoint in self.candidates():
+            start = time.monotonic()
+            try:
+                result = func(endpoint)
+            except FAILOVER_ERRORS as e:
+                self.report_failure(endpoint)
+                error = e
+                continue
+            self.report_success(endpoint, time.monotonic() - start)
+            return result
+        if error is None:
+            raise ValueError("network has no providers")
+        raise error
+
+    async def request_async(self, func: Callable[[str], Awaitable]):
+        """Await func(endpoint) on endpoints one by one until it succeeds."""
+        error = None
+        for endpoint in self.candidates():
+            start = time.monotonic()
+            try:
+                result = await func(endpoint)
+            except FAILOVER_ERRORS as e:
+                self.report_failure(endpoint)
+                error = e
+                continue
+            self.report_success(endpoint, time.monotonic() - start)
+            return result
+        if error is None:
+            raise ValueError("network has no providers")
+        raise error
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "endpoint": state.endpoint,
+                "latency": state.latency,
+                "failures": state.failures,
+                "is_healthy": state.is_healthy,
+            }
+            for state in self.states.values()
+        ]
+
+
+class FailoverHTTPProvider(JSONBaseProvider):
+    """Web3 provider sending every request through EndpointPool."""
+
+    def __init__(self, pool: EndpointPool, session: requests.Session) -> None:
+        super().__init__()
+        self.pool = pool
+        request_kwargs = {"timeout": config.RPC_TIMEOUT or 10}
+        self.providers = {
+            endpoint: HTTPProvider(
+                endpoint,
+                request_kwargs=request_kwargs,
+                session=session,
+            )
+            for endpoint in pool.endpoints
+        }
+
+    def make_request(self, method, params):
+        def send(endpoint):
+            response = self.providers[endpoint].make_request(method, params)
+            if not isinstance(response, dict) or not (
+                "result" in response or "error" in response
+            ):
+                raise BadResponseFormat(f"Bad response from {endpoint}: {response}")
+            return response
+
+        return self.pool.request(send)
+
+    def __str__(self):
+        return f"RPC connection {', '.join(self.pool.endpoints)}"
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from src.networks.providers import EndpointPool, FailoverHTTPProvider
+
+if TYPE_CHECKING:
+    from web3.contract import Contract
+    from web3.types import ABI
+
+
+class NetworkConnection:
+    """
+    Web3 instance with pooled http session, provider failover
+    and cached contracts for one set of network provider endpoints.
+    """
+
+    POOL_SIZE = 32
+    MAX_CONTRACTS = 2048
+
+    def __init__(self, endpoints: Tuple[str, ...]) -> None:
+        self.endpoints = endpoints
+        self.checked_at = time.monotonic()
+        self.session = requests.Session()
+        # one host pool per provider, so failover does not drop connections
+        adapter = HTTPAdapter(
+            pool_connections=max(len(endpoints), 1), pool_maxsize=self.POOL_SIZE
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = EndpointPool(endpoints)
+        self.web3 = Web3(FailoverHTTPProvider(self.pool, self.session))
+        self._contracts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_contract(self, abi: "ABI", address: str = None) -> "Contract":
+        # ABIs are module level constants, so identity is a stable key
+        key = (id(abi), address)
+        with self._lock:
+            contract = self._contracts.get(key)
+            if contract is not None:
+                self._contracts.move_to_end(key)
+                return contract
+        contract = self.web3.eth.contract(address=address, abi=abi)
+        with self._lock:
+            self._contracts[key] = contract
+            if len(self._contracts) > self.MAX_CONTRACTS:
+                self._contracts.popitem(last=False)
+        return contract
+
+
+class Web3Registry:
+    """
+    Process level registry of network connections by network id.
+    Provider endpoints are re-read from db every PROVIDERS_TTL seconds,
+    connection is rebuilt when they change. Provider signals drop
+    connections of the current process immediately.
+    """
+
+    PROVIDERS_TTL = 60
+
+    def __init__(self) -> None:
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def get_cached(self, network) -> Optional[NetworkConnection]:
+        """Return connection if providers were checked recently, without db queries"""
+        connection = self._connections.get(network.id)
+        if (
+            connection is not None
+            and time.monotonic() - connection.checked_at < self.PROVIDERS_TTL
+        ):
+            return connection
+        return None
+
+    def get(self, network) -> NetworkConnection:
+        connection = self.get_cached(network)
+        if connection is not None:
+            return connection
+        endpoints = tuple(
+            network.providers.order_by("id").values_list("endpoint", flat=True)
+        )
+        with self._lock:
+            connection = self._connections.get(network.id)
+            if connection is None or connection.endpoints != endpoints:
+                connection = NetworkConnection(endpoints)
+                self._connections[network.id] = connection
+            connection.checked_at = time.monotonic()
+        return connection
+
+    def invalidate(self, network_id: int) -> None:
+        with self._lock:
+            self._connections.pop(network_id, None)
+
+
+registry = Web3Registry()
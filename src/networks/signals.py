@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from src.accounts.models import MasterUser
-from src.networks.models import Network
+from src.networks.models import Network, Provider
+from src.networks.registry import registry
 from src.settings import config
 
 
@@ -11,6 +12,12 @@ def network_post_save_dispatcher(sender, instance, created, *args, **kwargs):
     create_master_user(instance, created)
 
 
+@receiver(post_save, sender=Provider)
+@receiver(post_delete, sender=Provider)
+def provider_change_dispatcher(sender, instance, *args, **kwargs):
+    registry.invalidate(instance.network_id)
+
+
 def create_master_user(network, created):
     """
     Create MasterUser objects for new Network.
@@ -0,0 +1,45 @@
+import pytest
+
+from src.networks.addresses import (
+    hex_to_tron,
+    to_checksum_address,
+    tron_to_ethereum,
+    tron_to_hex,
+)
+
+
+@pytest.mark.parametrize(
+    ("tron_address", "hex_address"),
+    [
+        (
+            "TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7",
+            "4174472e7d35395a6b5add427eecb7f4b62ad2b071",
+        ),
+        (
+            "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+            "41a614f803b6fd780986a42c78ec9c7f77e6ded13c",
+        ),
+    ],
+)
+def test_tron_address_codec(tron_address, hex_address):
+    assert tron_to_hex(tron_address) == hex_address
+    assert hex_to_tron(hex_address) == tron_address
+    assert hex_to_tron("0x" + hex_address[2:]) == tron_address
+
+
+def test_tron_invalid_checksum():
+    with pytest.raises(ValueError):
+        tron_to_hex("TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU8")
+
+
+def test_checksum_address():
+    expected = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+    assert to_checksum_address(expected.lower()) == expected
+    assert to_checksum_address(expected.upper().replace("0X", "0x")) == expected
+
+
+def test_tron_to_ethereum():
+    assert (
+        tron_to_ethereum("TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t").lower()
+        == "0xa614f803b6fd780986a42c78ec9c7f77e6ded13c"
+    )
@@ -0,0 +1,22 @@
+import pytest
+
+from src.settings import config
+
+URL = "/api/v1/networks/scanner-metrics/"
+
+
+@pytest.mark.django_db
+def test_scanner_metrics_permission(api, auth_api, monkeypatch):
+    monkeypatch.setattr(config, "SCANNER_METRICS_TOKEN", "scraper")
+
+    assert api.get(URL).status_code in (401, 403)
+    assert auth_api.get(URL).status_code in (401, 403)
+
+    auth_api.user.is_staff = True
+    auth_api.user.save()
+    assert auth_api.get(URL).status_code == 200
+
+    api.credentials(HTTP_AUTHORIZATION="Bearer wrong")
+    assert api.get(URL).status_code in (401, 403)
+    api.credentials(HTTP_AUTHORIZATION="Bearer scraper")
+    assert api.get(URL).status_code == 200
@@ -0,0 +1,38 @@
+import pytest
+from eth_abi import encode_abi
+
+from src.networks.registry import registry
+
+
+@pytest.mark.django_db
+def test_contract_call_many_failed_call(mixer):
+    """Failed call of a batch is None, other results are returned"""
+    network = mixer.blend("networks.Network", network_type="ethereum")
+    mixer.blend("networks.Provider", network=network, endpoint="http://eth.node")
+    token = "0x" + "11" * 20
+    user = "0x" + "22" * 20
+    calls = [
+        {
+            "contract_type": "token",
+            "address": token,
+            "function_name": "balanceOf",
+            "input_params": (user,),
+        }
+        for _ in range(3)
+    ]
+
+    def result(id_, value):
+        return {"id": id_, "result": "0x" + encode_abi(["uint256"], [value]).hex()}
+
+    def endpoint_post(path, payload):
+        return [
+            result(0, 5),
+            {"id": 1, "error": {"code": -32000, "message": "execution reverted"}},
+            result(2, 7),
+        ]
+
+    network.endpoint_post = endpoint_post
+    try:
+        assert network.contract_call_many(calls) == [5, None, 7]
+    finally:
+        registry.invalidate(network.id)
@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from scanners.tron.client import TronEventClient
+from src.networks.registry import registry
+
+
+@pytest.mark.django_db(transaction=True)
+def test_tron_request_after_providers_ttl(mixer):
+    """Expired providers are re-read off the event loop, not with a db query on it"""
+    network = mixer.blend("networks.Network", network_type="tron")
+    mixer.blend("networks.Provider", network=network, endpoint="http://tron.node")
+    connection = registry.get(network)
+    connection.checked_at = time.monotonic() - registry.PROVIDERS_TTL - 1
+
+    def handle(request):
+        return httpx.Response(200, json={"path": request.url.path})
+
+    async def request():
+        client = TronEventClient(network)
+        client.session = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        try:
+            return await client.request("POST", "/wallet/getnowblock")
+        finally:
+            await client.session.aclose()
+
+    assert asyncio.run(request()) == {"path": "/wallet/getnowblock"}
+    assert registry.get_cached(network) is not None
+    registry.invalidate(network.id)
@@ -0,0 +1,176 @@
+import pytest
+
+from scanners.base import MintData, ScannerABC
+from scanners.scanners import HandlerBuy, HandlerMintTransferBurn
+from src.accounts.services.owners import owners_cache
+from src.activity.models import TokenHistory
+from src.store.models import Ownership, Status
+from src.utilities import RedisClient
+
+EMPTY_ADDRESS = "0x" + "00" * 20
+CREATOR = "0x" + "11" * 20
+BUYER = "0x" + "22" * 20
+
+
+class FakeScanner(ScannerABC):
+    """Events are parsed already, block hashes are set by tests"""
+
+    EMPTY_ADDRESS = EMPTY_ADDRESS
+
+    def __init__(self, network, contract_type=None) -> None:
+        super().__init__(network, contract_type)
+        self.hashes = {}
+
+    def parse_data_mint(self, event):
+        return event
+
+    def get_last_network_block(self) -> int:
+        return max(self.hashes)
+
+    def get_block_hash(self, number: int) -> str:
+        return self.hashes.get(number, f"{number}a")
+
+
+@pytest.fixture
+def handler(mixer, tmp_path, monkeypatch):
+    # handler loggers write to logs/ of the working directory
+    (tmp_path / "logs").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        "scanners.scanners.get_ipfs_many",
+        lambda tokens: ["ipfs_1" for _ in tokens],
+    )
+    owners_cache.clear()
+    network = mixer.blend("networks.Network", network_type="ethereum")
+    return HandlerMintTransferBurn(network, FakeScanner(network))
+
+
+@pytest.fixture
+def token(mixer, handler):
+    """ERC1155 token created by CREATOR, waiting for its mint event"""
+    creator = mixer.blend("accounts.AdvUser", username=CREATOR)
+    token = mixer.blend(
+        "store.Token",
+        status=Status.PENDING,
+        ipfs="ipfs_1",
+        total_supply=10,
+        selling=False,
+        creator=creator,
+        collection__network=handler.network,
+        collection__standart="ERC1155",
+        collection__address="0x" + "33" * 20,
+    )
+    mixer.blend(
+        "store.Ownership",
+        token=token,
+        owner=creator,
+        quantity=10,
+        selling=False,
+    )
+    return token
+
+
+def mint_and_transfer(token):
+    address = token.collection.address
+    return [
+        MintData(1, CREATOR, EMPTY_ADDRESS, "0xmint", 10, address, 101, 0),
+        MintData(1, BUYER, CREATOR, "0xtransfer", 3, address, 102, 0),
+    ]
+
+
+def quantities(token):
+    return dict(
+        Ownership.objects.filter(token=token).values_list(
+            "owner__username_lower", "quantity"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_mint_and_transfer_in_one_range(handler, token):
+    handler.save_events(mint_and_transfer(token))
+
+    token.refresh_from_db()
+    assert token.status == Status.COMMITTED
+    assert token.internal_id == 1
+    assert quantities(token) == {CREATOR: 7, BUYER: 3}
+    assert set(
+        TokenHistory.objects.filter(token=token).values_list("method", "log_index")
+    ) == {("Mint", 0), ("Transfer", 0)}
+
+
+@pytest.mark.django_db
+def test_replayed_range_is_not_applied_twice(handler, token):
+    """Events saved before are found by (tx_hash, log_index)"""
+    events = mint_and_transfer(token)
+    handler.save_events(events)
+    handler.save_events(events)
+
+    assert quantities(token) == {CREATOR: 7, BUYER: 3}
+    assert TokenHistory.objects.filter(token=token).count() == 2
+
+
+@pytest.mark.django_db
+def test_find_fork_block_and_rollback(handler, token):
+    scanner = handler.scanner
+    name = f"mint_{handler.network.name}"
+    connection = RedisClient().connection
+    try:
+        for block in (100, 101, 102):
+            scanner.save_last_block(name, block)
+        handler.save_events(mint_and_transfer(token))
+        assert scanner.find_fork_block(name) is None
+
+        # block 102 is replaced, 101 is still in the chain
+        scanner.hashes[102] = "102b"
+        fork_block = scanner.find_fork_block(name)
+        assert fork_block == 101
+        handler.rollback(fork_block)
+
+        token.refresh_from_db()
+        assert token.status == Status.COMMITTED
+        assert quantities(token) == {CREATOR: 10}
+        assert not TokenHistory.objects.filter(token=token, method="Transfer").exists()
+
+        handler.rollback(100)
+        token.refresh_from_db()
+        assert token.status == Status.PENDING
+        assert not TokenHistory.objects.filter(token=token).exists()
+    finally:
+        connection.delete(name, f"{name}_hash", f"blocks_{handler.network.name}")
+
+
+@pytest.mark.django_db
+def test_buy_rollback_reverts_erc721_owner(mixer, handler):
+    """Buy saved over the transfer of the sale moved the ownership too"""
+    creator = mixer.blend("accounts.AdvUser", username=CREATOR)
+    buyer = mixer.blend("accounts.AdvUser", username=BUYER)
+    token = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        owner=buyer,
+        collection__network=handler.network,
+        collection__standart="ERC721",
+    )
+    mixer.blend("store.Ownership", token=token, owner=buyer, quantity=1)
+    mixer.blend(
+        "activity.TokenHistory",
+        token=token,
+        method="Buy",
+        tx_hash="0xbuy",
+        block_number=102,
+        log_index=0,
+        amount=1,
+        new_owner=buyer,
+        old_owner=creator,
+        price=None,
+        currency=None,
+    )
+    scanner = FakeScanner(handler.network, contract_type="ERC721")
+
+    HandlerBuy(handler.network, scanner).rollback(101)
+
+    token.refresh_from_db()
+    assert token.owner_id == creator.id
+    assert quantities(token) == {CREATOR: 1}
+    assert not TokenHistory.objects.filter(token=token).exists()
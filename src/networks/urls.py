@@ -1,8 +1,9 @@
 from django.urls import path
 
-from src.networks.views import NetworksModelView
+from src.networks.views import NetworksModelView, ScannerMetricsView
 
 urlpatterns = [
+    path("scanner-metrics/", ScannerMetricsView.as_view()),
     path(
         "",
         NetworksModelView.as_view({"get": "list"}),
@@ -1,7 +1,14 @@
+import secrets
+
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from src.networks.metrics import render_prometheus
 from src.networks.models import Network
 from src.networks.serializers import NetworkSerializer
+from src.settings import config
 
 
 class NetworksModelView(ModelViewSet):
@@ -10,3 +17,28 @@ class NetworksModelView(ModelViewSet):
     serializer_class = NetworkSerializer
     queryset = Network.objects.all()
     lookup_field = "name"
+
+
+class IsMetricsScraper(BasePermission):
+    """Allow staff users and requests with the bearer token of metrics scraper."""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = config.SCANNER_METRICS_TOKEN
+        authorization = request.META.get("HTTP_AUTHORIZATION", "")
+        return bool(token) and secrets.compare_digest(
+            authorization.encode(), f"Bearer {token}".encode()
+        )
+
+
+class ScannerMetricsView(APIView):
+    """Return scanner metrics in Prometheus text format."""
+
+    permission_classes = [IsMetricsScraper]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -1,14 +1,111 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+
+from redis.exceptions import RedisError
+
 from src.rates.models import UsdRate
+from src.utilities import RedisClient
+
+RATES_VERSION_KEY = "usd_rates_version"
+
+
+class Rate(NamedTuple):
+    id: int
+    symbol: str
+    rate: Optional[Decimal]
+    decimals: Optional[int]
+
+
+class RatesSnapshot:
+    """
+    Process-local copy of rates. Version in redis is bumped when rates
+    are written, the snapshot is reloaded when it sees a new version.
+    Redis is checked at most once in CHECK_INTERVAL seconds,
+    without redis rates are read from the database on every call.
+    """
+
+    CHECK_INTERVAL = 5  # seconds
+
+    def __init__(self) -> None:
+        self.version = None
+        self.checked_at = None
+        self.by_id: Dict[int, Rate] = {}
+        self.by_symbol: Dict[str, Rate] = {}
+        self.rates: Dict[str, Optional[Decimal]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self.checked_at is not None
+                and now - self.checked_at < self.CHECK_INTERVAL
+            ):
+                return
+            try:
+                version = RedisClient().connection.get(RATES_VERSION_KEY)
+            except RedisError as e:
+                logging.warning(f"Rates version is not available: {e}")
+                self.load()
+                self.checked_at = None
+                return
+            if self.checked_at is None or version != self.version:
+                self.load()
+            self.version = version
+            self.checked_at = now
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.checked_at = None
+
+    def load(self) -> None:
+        rates = [
+            Rate(
+                id=rate.id,
+                symbol=rate.symbol,
+                rate=rate.rate,
+                decimals=rate.get_decimals if rate.decimal is not None else None,
+            )
+            for rate in UsdRate.objects.all()
+        ]
+        self.by_id = {rate.id: rate for rate in rates}
+        by_symbol = {}
+        for rate in rates:
+            by_symbol.setdefault(rate.symbol, rate)
+        # rate of a symbol is the last one, decimals are of the first one
+        self.rates = {rate.symbol: rate.rate for rate in rates}
+        self.by_symbol = by_symbol
+
+    def get(self, currency_id: int) -> Optional[Rate]:
+        self.refresh()
+        return self.by_id.get(currency_id)
+
+
+rates_snapshot = RatesSnapshot()
+
+
+def bump_rates_version() -> None:
+    """Make every process reload rates, called after rates are written"""
+    rates_snapshot.invalidate()
+    try:
+        RedisClient().connection.incr(RATES_VERSION_KEY)
+    except RedisError as e:
+        logging.warning(f"Rates version is not bumped: {e}")
 
 
 def get_usd_prices():
-    return {rate.symbol: rate.rate for rate in UsdRate.objects.all()}
+    rates_snapshot.refresh()
+    return dict(rates_snapshot.rates)
 
 
 def get_decimals(currency):
     if currency == "USD":
         return 10 ** 2
-    return UsdRate.objects.filter(symbol=currency).first().get_decimals
+    rates_snapshot.refresh()
+    return rates_snapshot.by_symbol[str(currency)].decimals
 
 
 def calculate_amount(original_amount, from_currency, to_currency="USD"):
@@ -21,3 +118,18 @@ def calculate_amount(original_amount, from_currency, to_currency="USD"):
     currency_rate = usd_rates[from_currency] / usd_rates[to_currency]
     amount = float(original_amount) / get_decimals(from_currency) * float(currency_rate)
     return float("{0:.2f}".format(amount)), currency_rate
+
+
+def calculate_usd_price(currency_id, currency_price, currency_minimal_bid):
+    """
+    USD price of listing price or minimal bid in currency units,
+    rounded as calculate_amount, None without price or currency.
+    """
+    amount = currency_price or currency_minimal_bid
+    if not amount or currency_id is None:
+        return None
+    rate = rates_snapshot.get(currency_id)
+    if rate is None or rate.decimals is None:
+        return None
+    usd_price, _ = calculate_amount(int(amount * rate.decimals), rate.symbol)
+    return Decimal(str(usd_price))
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class RatesConfig(AppConfig):
-    name = 'rates'
+    name = "src.rates"
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from src.rates.api import bump_rates_version, rates_snapshot
+from src.rates.models import UsdRate
+
+
+@receiver(post_save, sender=UsdRate)
+@receiver(post_delete, sender=UsdRate)
+def usd_rate_changed_dispatcher(sender, instance, *args, **kwargs):
+    # other processes reload rates after they are committed
+    rates_snapshot.invalidate()
+    transaction.on_commit(bump_rates_version)
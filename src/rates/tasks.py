@@ -5,8 +5,10 @@ import traceback
 import requests
 
 from celery import shared_task
+from src.rates.api import bump_rates_version
 from src.rates.models import UsdRate
 from src.settings import config
+from src.store.services.usd_prices import update_usd_prices
 from src.utilities import alert_bot
 
 QUERY_FSYM = "usd"
@@ -34,3 +36,6 @@ def rates_checker():
             continue
         rates = UsdRate.objects.filter(coin_node=coin_node)
         rates.update(rate=rate)
+        update_usd_prices(rates)
+    # update skips post_save signal of rates
+    bump_rates_version()
@@ -1,19 +1,39 @@
+import base64
 import json
 import logging
-import operator
 from abc import ABC, abstractmethod
 from datetime import datetime
 from decimal import Decimal
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Count, Exists, OuterRef, Q
+from django.db.models import (
+    Case,
+    Count,
+    DateTimeField,
+    DecimalField,
+    Exists,
+    F,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from src.accounts.models import AdvUser
 from src.accounts.serializers import UserSearchSerializer
-from src.rates.api import calculate_amount
-from src.store.models import Bid, Collection, Ownership, Token
+from src.activity.models import TokenHistory, UserAction
+from src.store.models import Bid, Collection, Ownership, Token, ViewsTracker
 from src.store.serializers import CollectionSearchSerializer, TokenSerializer
+from src.store.services.full_text import text_search
+from src.store.services.usd_prices import stored_usd_price
+
+EPOCH = timezone.make_aware(datetime.fromtimestamp(0))
 
 
 class SearchABC(ABC):
@@ -26,10 +46,10 @@ class SearchABC(ABC):
         kwargs.pop("page", None)
 
     def parse(self, **kwargs):
+        """Return filtered and ordered items, serialized by the view per page"""
         self.initial()
         self.remove_unused_kwargs(kwargs)
 
-        current_user = kwargs.pop("current_user", None)
         order_by = kwargs.pop("order_by", None)
 
         for method, value in kwargs.items():
@@ -43,11 +63,7 @@ class SearchABC(ABC):
         if order_by and hasattr(self, "order_by"):
             self.order_by(order_by)
 
-        return self.serializer(
-            self.items,
-            context={"user": current_user},
-            many=True,
-        ).data
+        return self.items
 
 
 class SearchToken(SearchABC):
@@ -68,9 +84,7 @@ class SearchToken(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(name__icontains=word)
+            self.items = text_search(self.items, words[0], "name")
 
     def stats(self, stats):
         if stats and stats[0]:
@@ -116,29 +130,26 @@ class SearchToken(SearchABC):
             )
 
     def _price_filter_tokens(self, price, type_):
-        relate = operator.gt
-        if type_ == "max_price":
-            relate = operator.lt
+        lookup = "lt" if type_ == "max_price" else "gt"
 
         if price and price[0] and str(price[0]).isdigit():
-            min_price = Decimal(price[0])
-
-            tokens = self.items
-            ownerships = Ownership.objects.filter(token__in=tokens)
-            ownerships = [
-                ownership.token.id
-                for ownership in ownerships
-                if ownership.usd_price and relate(ownership.usd_price, min_price)
-            ]
-            tokens = [
-                token
-                for token in tokens
-                if token.usd_price and relate(token.usd_price, min_price)
-            ]
-
-            token_ids = [token.id for token in tokens]
-            token_ids.extend(ownerships)
-            self.items = Token.objects.filter(id__in=token_ids)
+            price_filter = {f"listing_usd_price__{lookup}": Decimal(price[0])}
+            ownerships = Ownership.objects.annotate(
+                listing_usd_price=stored_usd_price("token__currency")
+            )
+            # zero usd price is not a price, as in listings without price
+            self.items = self.items.annotate(
+                listing_usd_price=stored_usd_price()
+            ).filter(
+                Q(listing_usd_price__gt=0, **price_filter)
+                | Exists(
+                    ownerships.filter(
+                        token__id=OuterRef("id"),
+                        listing_usd_price__gt=0,
+                        **price_filter,
+                    )
+                )
+            )
 
     def min_price(self, price):
         self._price_filter_tokens(price, "min_price")
@@ -249,59 +260,103 @@ class SearchToken(SearchABC):
                     )
                 )
 
-    def order_by_price(self, token, reverse=False):
-        currency = token.currency.symbol
-        if not token.selling:
-            return 0
-        if token.standart == "ERC721":
-            price = token.price if token.currency_price else token.minimal_bid
-            return calculate_amount(price, currency)[0]
-        owners = token.ownership_set.all()
-        prices = [
-            owner.get_currency_price for owner in owners if owner.get_currency_price
-        ]
-        prices = [calculate_amount(price, currency)[0] for price in prices]
-        if reverse:
-            return max(prices)
-        return min(prices)
-
-    def order_by_likes(self, token):
-        return token.useraction_set.filter(method="like").count()
-
-    def order_by_created_at(self, token):
-        return token.updated_at
-
-    def order_by_views(self, token):
-        return token.viewstracker_set.count()
-
-    def order_by_sale(self, token):
-        history = token.tokenhistory_set.filter(method="Buy").order_by("date").last()
-        if history and history.date:
-            return history.date
-        return timezone.make_aware(datetime.fromtimestamp(0))
-
-    def order_by_transfer(self, token):
-        history = (
-            token.tokenhistory_set.filter(method="Transfer").order_by("date").last()
+    def order_by_price(self, reverse=False):
+        """
+        USD price of selling token, tokens not on sale have zero price.
+        ERC1155 token is priced by its cheapest ownership, the most
+        expensive one in reverse order.
+        """
+        aggregate = Max if reverse else Min
+        ownerships_price = Subquery(
+            Ownership.objects.filter(token=OuterRef("id"))
+            .order_by()
+            .values("token")
+            .annotate(price=aggregate(stored_usd_price("token__currency")))
+            .values("price")
+        )
+        price = Case(
+            When(selling=False, then=Value(0)),
+            When(collection__standart="ERC721", then=stored_usd_price()),
+            default=ownerships_price,
+            output_field=DecimalField(),
+        )
+        return Coalesce(price, Value(0), output_field=DecimalField())
+
+    def order_by_likes(self, reverse=False):
+        return self._count(UserAction.objects.filter(method="like"))
+
+    def order_by_created_at(self, reverse=False):
+        return F("updated_at")
+
+    def order_by_views(self, reverse=False):
+        return self._count(ViewsTracker.objects.all())
+
+    def order_by_sale(self, reverse=False):
+        return self._last_history_date("Buy")
+
+    def order_by_transfer(self, reverse=False):
+        return self._last_history_date("Transfer")
+
+    def order_by_auction_end(self, reverse=False):
+        now = timezone.now()
+        return Case(
+            When(
+                Q(currency_price__isnull=True)
+                | Q(currency_price=0)
+                | Q(currency__isnull=True),
+                collection__standart="ERC721",
+                selling=True,
+                start_auction__lt=now,
+                end_auction__gt=now,
+                then=F("end_auction"),
+            ),
+            default=Value(EPOCH),
+            output_field=DateTimeField(),
         )
-        if history and history.date:
-            return history.date
-        return timezone.make_aware(datetime.fromtimestamp(0))
-
-    def order_by_auction_end(self, token):
-        default_value = timezone.make_aware(datetime.fromtimestamp(0))
-        if token.is_timed_auc_selling:
-            return token.end_auction
-        return default_value
-
-    def order_by_last_sale(self, token):
-        history = token.tokenhistory_set.filter(method="Buy").order_by("date").last()
-        if history and history.price:
-            return history.price
-        return 0
+
+    def order_by_last_sale(self, reverse=False):
+        return Coalesce(
+            Subquery(
+                TokenHistory.objects.filter(token=OuterRef("id"), method="Buy")
+                .order_by("-date")
+                .values("price")[:1]
+            ),
+            Value(0),
+            output_field=DecimalField(),
+        )
+
+    def _count(self, queryset):
+        """Number of related rows, subquery does not multiply joined rows"""
+        return Coalesce(
+            Subquery(
+                queryset.filter(token=OuterRef("id"))
+                .order_by()
+                .values("token")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+    def _last_history_date(self, method):
+        return Coalesce(
+            Subquery(
+                TokenHistory.objects.filter(token=OuterRef("id"), method=method)
+                .order_by()
+                .values("token")
+                .annotate(last_date=Max("date"))
+                .values("last_date")
+            ),
+            Value(EPOCH),
+            output_field=DateTimeField(),
+        )
+
+    def cursor(self, cursor):
+        """Keyset of the last token of previous page, applied with ordering"""
+        self._cursor = cursor[0] if cursor and cursor[0] else None
 
     def order_by(self, order_by):
-        tokens = list(self.items)
         reverse = False
         if order_by is not None:
             order_by = order_by[0]
@@ -310,13 +365,44 @@ class SearchToken(SearchABC):
                 reverse = True
 
         try:
-            tokens = sorted(
-                tokens, key=getattr(self, f"order_by_{order_by}"), reverse=reverse
-            )
+            expression = getattr(self, f"order_by_{order_by}")(reverse)
         except AttributeError:
             logging.warning(f"Unknown token sort method {order_by}")
+            return
+
+        # id makes the order total, so pages of keyset pagination do not overlap
+        direction = "-" if reverse else ""
+        self.items = self.items.annotate(order_value=expression).order_by(
+            f"{direction}order_value", f"{direction}id"
+        )
+        cursor = getattr(self, "_cursor", None)
+        if cursor:
+            # total of the search, not of tokens after the cursor
+            self.total = self.items.count()
+            self._after(cursor, reverse)
+
+    def _after(self, cursor, reverse):
+        try:
+            value, token_id = json.loads(base64.urlsafe_b64decode(cursor))
+        except (ValueError, TypeError) as e:
+            logging.warning(f"Invalid search cursor {cursor}: {e}")
+            return
+        field = self.items.query.annotations["order_value"].output_field
+        value = field.to_python(value)
+        lookup = "lt" if reverse else "gt"
+        self.items = self.items.filter(
+            Q(**{f"order_value__{lookup}": value})
+            | Q(order_value=value, **{f"id__{lookup}": token_id})
+        )
 
-        self.items = tokens
+    def get_cursor(self, token) -> str:
+        """Cursor of the page after token, token is from ordered items"""
+        value = token.order_value
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif value is not None:
+            value = str(value)
+        return base64.urlsafe_b64encode(json.dumps([value, token.id]).encode()).decode()
 
 
 class SearchCollection(SearchABC):
@@ -346,9 +432,7 @@ class SearchCollection(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(name__icontains=word)
+            self.items = text_search(self.items, words[0], "name")
 
     def network(self, network):
         if network and network[0]:
@@ -364,9 +448,7 @@ class SearchUser(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(display_name__icontains=word)
+            self.items = text_search(self.items, words[0], "display_name")
 
     def verificated(self, verificated):
         self.items = self.items.filter(is_verificated=verificated[0].lower() == "true")
@@ -394,8 +476,9 @@ class SearchUser(SearchABC):
         self.items = users
 
 
+# search keeps state of a request, a new one is created per request
 Search = {
-    "token": SearchToken(),
-    "collection": SearchCollection(),
-    "user": SearchUser(),
+    "token": SearchToken,
+    "collection": SearchCollection,
+    "user": SearchUser,
 }
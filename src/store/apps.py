@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class StoreConfig(AppConfig):
@@ -6,3 +7,8 @@ class StoreConfig(AppConfig):
 
     def ready(self):
         from . import signals
+        from .services.full_text import create_trigram_extension
+        from .services.usd_prices import fill_usd_prices
+
+        pre_migrate.connect(create_trigram_extension, sender=self)
+        post_migrate.connect(fill_usd_prices, sender=self)
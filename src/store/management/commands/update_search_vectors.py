@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from src.accounts.models import AdvUser
+from src.store.models import Collection, Token
+from src.store.services.full_text import update_search_vectors
+
+
+class Command(BaseCommand):
+    """Rebuild full-text search vectors with 'manage.py update_search_vectors'"""
+
+    help = "Rebuild search vectors of tokens, collections and users"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=10000,
+            help="Rows updated in one query",
+        )
+
+    def handle(self, *args, **options):
+        for model in (Token, Collection, AdvUser):
+            ids = list(model.objects.order_by("id").values_list("id", flat=True))
+            for start in range(0, len(ids), options["batch"]):
+                batch = ids[start : start + options["batch"]]
+                update_search_vectors(model.objects.filter(id__in=batch))
+            self.stdout.write(f"{model.__name__}: {len(ids)} search vectors updated")
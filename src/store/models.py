@@ -5,6 +5,8 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Tuple, Union
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator
 from django.db import models
@@ -22,7 +24,7 @@ from src.consts import (
     TOKEN_TRANSFER_GAS_LIMIT,
 )
 from src.networks.models import Network
-from src.rates.api import calculate_amount
+from src.rates.api import calculate_usd_price
 from src.rates.models import UsdRate
 from src.settings import config
 from src.utilities import get_media_from_ipfs, sign_message, to_int
@@ -174,11 +176,21 @@ class Collection(models.Model):
     instagram = models.URLField(blank=True, null=True, default=None)
     medium = models.URLField(blank=True, null=True, default=None)
     telegram = models.URLField(blank=True, null=True, default=None)
+    # full-text search, rebuilt by post_save signal and update_search_vectors command
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = CollectionManager()
 
     class Meta:
         unique_together = [["address", "network"]]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="collection_search_vector"),
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="collection_name_trgm",
+            ),
+        ]
 
     @property
     def avatar(self):
@@ -415,6 +427,15 @@ class Token(models.Model):
         default=None,
         blank=True,
     )
+    # price or minimal bid in USD, kept by signals and rates updates for price filters
+    usd_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=2,
+        default=None,
+        blank=True,
+        null=True,
+        db_index=True,
+    )
     owner = models.ForeignKey(
         "accounts.AdvUser",
         on_delete=models.PROTECT,
@@ -447,9 +468,19 @@ class Token(models.Model):
     end_auction = models.DateTimeField(blank=True, null=True, default=None)
     digital_key = models.CharField(max_length=1000, blank=True, null=True, default=None)
     external_link = models.CharField(max_length=200, null=True, blank=True)
+    # full-text search, rebuilt by post_save signal and update_search_vectors command
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = TokenManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="token_search_vector"),
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="token_name_trgm"
+            ),
+        ]
+
     def _details_getter(self, field):
         details = list()
         for key, item in getattr(self, field).items():
@@ -515,12 +546,11 @@ class Token(models.Model):
         if self.currency_price and self.currency:
             return int(self.currency_price * self.currency.get_decimals)
 
-    @property
-    def usd_price(self):
-        if self.price:
-            return calculate_amount(self.price, self.currency.symbol)[0]
-        if self.minimal_bid:
-            return calculate_amount(self.minimal_bid, self.currency.symbol)[0]
+    def calculate_usd_price(self):
+        """USD price of listing or minimal bid, stored in usd_price on save"""
+        return calculate_usd_price(
+            self.currency_id, self.currency_price, self.currency_minimal_bid
+        )
 
     @property
     def minimal_bid(self):
@@ -1033,6 +1063,15 @@ class Ownership(models.Model):
         null=True,
         decimal_places=18,
     )
+    # price or minimal bid in USD, kept by signals and rates updates for price filters
+    usd_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=2,
+        default=None,
+        blank=True,
+        null=True,
+        db_index=True,
+    )
 
     @property
     def price(self):
@@ -1056,14 +1095,11 @@ class Ownership(models.Model):
             return self.price
         return self.minimal_bid
 
-    @property
-    def usd_price(self):
-        if not self.token.currency:
-            return None
-        if self.price:
-            return calculate_amount(self.price, self.token.currency.symbol)[0]
-        if self.minimal_bid:
-            return calculate_amount(self.minimal_bid, self.token.currency.symbol)[0]
+    def calculate_usd_price(self):
+        """USD price of listing or minimal bid, stored in usd_price on save"""
+        return calculate_usd_price(
+            self.token.currency_id, self.currency_price, self.currency_minimal_bid
+        )
 
 
 class Tags(models.Model):
@@ -2,7 +2,7 @@ import logging
 from collections import Counter
 from decimal import Decimal
 
-from django.db.models import Count, Sum
+from django.db.models import Count, Min, Sum
 from rest_framework import serializers
 
 from src.accounts.serializers import CreatorSerializer, UserOwnerSerializer
@@ -23,6 +23,7 @@ from src.store.models import (
     TransactionTracker,
     ViewsTracker,
 )
+from src.store.services.usd_prices import stored_usd_price
 from src.utilities import to_int
 
 
@@ -513,13 +514,14 @@ class CollectionSerializer(CollectionSlimSerializer):
         return obj.token_set.committed().count()
 
     def get_floor_price(self, obj):
-        tokens = list(obj.token_set.committed())
-        if not tokens:
-            return 0
-        tokens = [token.usd_price for token in tokens if token.usd_price]
-        if tokens:
-            return min(tokens)
-        return 0
+        floor_price = (
+            obj.token_set.committed()
+            .annotate(listing_usd_price=stored_usd_price())
+            .filter(listing_usd_price__gt=0)
+            .aggregate(floor_price=Min("listing_usd_price"))
+            .get("floor_price")
+        )
+        return floor_price or 0
 
     def get_owners(self, obj):
         if obj.standart=="ERC721":
@@ -7,6 +7,7 @@ import requests
 from src.accounts.models import AdvUser
 from src.settings import config
 from src.store.models import Collection, Status, Token
+from src.store.services.full_text import update_search_vectors
 from src.utilities import RedisClient
 
 logger = logging.getLogger("celery")
@@ -128,7 +129,11 @@ class OpenSeaImport:
             offset += 1
             token_models = self.get_tokens_models(tokens, collection)
             if token_models:
-                Token.objects.bulk_create(token_models)
+                created = Token.objects.bulk_create(token_models)
+                # bulk_create skips post_save signal, which builds search vector
+                update_search_vectors(
+                    Token.objects.filter(id__in=[token.id for token in created])
+                )
 
     def get_or_save_collection(self, collection):
         """parse data and get or create collection by network and address"""
@@ -0,0 +1,89 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Coalesce
+
+from src.accounts.models import AdvUser
+from src.store.models import Collection, Token
+
+# "simple" config: names are mostly not english words, no stemming or stop words
+SEARCH_CONFIG = "simple"
+
+# weighted text fields of search vector of every searchable model
+SEARCH_FIELDS = {
+    Token: (("name", "A"), ("description", "B")),
+    Collection: (("name", "A"), ("symbol", "A"), ("description", "B")),
+    AdvUser: (("display_name", "A"), ("custom_url", "B")),
+}
+
+
+def search_vector(model):
+    fields = iter(SEARCH_FIELDS[model])
+    field, weight = next(fields)
+    vector = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+    for field, weight in fields:
+        vector += SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+    return vector
+
+
+def update_search_vectors(queryset) -> None:
+    """Rebuild search vectors of queryset rows in the database"""
+    queryset.update(search_vector=search_vector(queryset.model))
+
+
+def get_search_text(instance) -> tuple:
+    # __dict__ is read to not load deferred fields
+    return tuple(
+        instance.__dict__.get(field) for field, _ in SEARCH_FIELDS[type(instance)]
+    )
+
+
+def remember_search_text(instance) -> None:
+    """Keep loaded text fields, called on post_init"""
+    instance._search_text = get_search_text(instance)
+
+
+def update_search_vector(instance, created=False, update_fields=None) -> None:
+    """Rebuild search vector of saved instance if its text fields changed"""
+    fields = {field for field, _ in SEARCH_FIELDS[type(instance)]}
+    if update_fields is not None and not fields.intersection(update_fields):
+        return
+    search_text = get_search_text(instance)
+    if not created and search_text == getattr(instance, "_search_text", None):
+        return
+    update_search_vectors(type(instance).objects.filter(id=instance.id))
+    instance._search_text = search_text
+
+
+def create_trigram_extension(**kwargs) -> None:
+    """Trigram indexes need pg_trgm, created before migrations are applied"""
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def text_search(queryset, text, field):
+    """
+    Filter queryset by every word of text, ordered by relevance.
+    Word matches a full word of search vector or a part of field,
+    partial matches use trigram index of the field.
+    A later order_by of the search replaces the relevance order.
+    """
+    words = [word for word in text.split(" ") if word]
+    if not words:
+        return queryset
+    for word in words:
+        queryset = queryset.filter(
+            Q(**{f"{field}__icontains": word})
+            | Q(search_vector=SearchQuery(word, config=SEARCH_CONFIG))
+        )
+    query = SearchQuery(" ".join(words), config=SEARCH_CONFIG)
+    zero = Value(0.0, output_field=FloatField())
+    rank = Coalesce(SearchRank("search_vector", query), zero) + Coalesce(
+        TrigramSimilarity(field, " ".join(words)), zero
+    )
+    return queryset.annotate(search_rank=rank).order_by("-search_rank", "-id")
@@ -1,5 +1,6 @@
 import json
 import logging
+from collections import defaultdict
 
 import ipfshttpclient
 
@@ -53,6 +54,35 @@ def get_ipfs(token_id, collection) -> dict:
     )
 
 
+def get_ipfs_many(tokens) -> list:
+    """
+    return ipfs of (token_id, collection) pairs,
+    tokenURI calls of every network are sent in one batch,
+    ipfs of a failed call is None
+    """
+    calls = defaultdict(list)
+    for index, (token_id, collection) in enumerate(tokens):
+        calls[collection.network].append(
+            (
+                index,
+                {
+                    "contract_type": f"{collection.standart.lower()}main",
+                    "address": collection.address,
+                    "function_name": "tokenURI",
+                    "input_params": (int(token_id),),
+                    "input_type": ("uint256",),
+                    "output_types": ("string",),
+                },
+            )
+        )
+    result = [None] * len(tokens)
+    for network, network_calls in calls.items():
+        values = network.contract_call_many([call for _, call in network_calls])
+        for (index, _), value in zip(network_calls, values):
+            result[index] = value
+    return result
+
+
 def get_ipfs_by_hash(ipfs_hash) -> dict:
     """
     return ipfs by hash
@@ -0,0 +1,61 @@
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from src.rates.models import UsdRate
+from src.store.models import Ownership, Token
+
+
+def listing_usd_price(rate):
+    """USD price of listing or minimal bid by rate expression, as calculate_usd_price"""
+    listing_price = Coalesce(NullIf(F("currency_price"), 0), F("currency_minimal_bid"))
+    return listing_price * rate
+
+
+def stored_usd_price(currency="currency"):
+    """
+    Stored USD price, rows saved before it was stored
+    are converted by rate of the currency as before.
+    """
+    return Coalesce(
+        F("usd_price"),
+        listing_usd_price(F(f"{currency}__rate")),
+        output_field=DecimalField(),
+    )
+
+
+def update_usd_prices(currencies, **filters) -> None:
+    """Recalculate stored USD prices of tokens and ownerships after rates change"""
+    for currency in currencies:
+        if currency.rate is None:
+            continue
+        rate = Value(currency.rate, output_field=DecimalField())
+        Token.objects.filter(currency=currency, **filters).update(
+            usd_price=listing_usd_price(rate)
+        )
+        # ownership price is in currency of its token
+        Ownership.objects.filter(token__currency=currency, **filters).update(
+            usd_price=listing_usd_price(rate)
+        )
+
+
+def update_ownership_usd_prices(token) -> None:
+    """Recalculate USD prices of ownerships after currency of their token changes"""
+    ownerships = Ownership.objects.filter(token=token)
+    rate = (
+        UsdRate.objects.filter(id=token.currency_id)
+        .values_list("rate", flat=True)
+        .first()
+    )
+    if rate is None:
+        ownerships.update(usd_price=None)
+        return
+    rate = Value(rate, output_field=DecimalField())
+    ownerships.update(usd_price=listing_usd_price(rate))
+
+
+def fill_usd_prices(**kwargs) -> None:
+    """
+    Fill USD prices of tokens and ownerships saved before they were stored,
+    runs after migrate, so price filters do not wait for rates_checker.
+    """
+    update_usd_prices(UsdRate.objects.all(), usd_price__isnull=True)
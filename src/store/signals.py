@@ -1,22 +1,53 @@
 import random
 
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 
 from src.accounts.models import DefaultAvatar
 from src.store.models import Collection, Ownership, Token
+from src.store.services.full_text import remember_search_text, update_search_vector
+from src.store.services.usd_prices import update_ownership_usd_prices
 
 
 @receiver(post_save, sender=Collection)
-def collection_post_save_dispatcher(sender, instance, created, *args, **kwargs):
+def collection_post_save_dispatcher(
+    sender, instance, created, update_fields=None, *args, **kwargs
+):
     update_delete_status(instance)
     set_default_avatar(instance, created)
+    update_search_vector(instance, created, update_fields)
+
+
+@receiver(post_init, sender=Collection)
+@receiver(post_init, sender=Token)
+def search_post_init_dispatcher(sender, instance, *args, **kwargs):
+    remember_search_text(instance)
+
+
+@receiver(post_init, sender=Token)
+def token_post_init_dispatcher(sender, instance, *args, **kwargs):
+    # ownerships are priced in currency of the token
+    instance._saved_currency_id = instance.__dict__.get("currency_id")
 
 
 @receiver(pre_save, sender=Token)
 def token_pre_save_dispatcher(sender, instance, *args, **kwargs):
     unique_name_for_network_validator(instance)
+    set_usd_price(instance)
+
+
+@receiver(post_save, sender=Token)
+def token_post_save_dispatcher(
+    sender, instance, created, update_fields=None, *args, **kwargs
+):
+    update_search_vector(instance, created, update_fields)
+    update_currency_usd_prices(instance, created, update_fields)
+
+
+@receiver(pre_save, sender=Ownership)
+def ownership_pre_save_dispatcher(sender, instance, *args, **kwargs):
+    set_usd_price(instance)
 
 
 @receiver(post_save, sender=Ownership)
@@ -38,11 +69,35 @@ def unique_name_for_network_validator(token):
         raise ValidationError("Name is occupied")
 
 
+def set_usd_price(instance):
+    """
+    Store USD price of token or ownership listing for price filters.
+    Bulk updates set it themselves.
+    """
+    instance.usd_price = instance.calculate_usd_price()
+
+
+def update_currency_usd_prices(token, created, update_fields=None):
+    """Recalculate USD prices of ownerships if currency of the token changed"""
+    if update_fields is not None and "currency" not in update_fields:
+        return
+    if created or token.currency_id == token._saved_currency_id:
+        return
+    update_ownership_usd_prices(token)
+    token._saved_currency_id = token.currency_id
+
+
 def recalculate_token_sell_status(ownership):
     """
     Recalculate 1155 token fields: selling, currency, currency_price.
     """
-    token = ownership.token
+    update_token_sell_status(ownership.token)
+
+
+def update_token_sell_status(token):
+    """
+    Set token selling fields by its selling ownerships.
+    """
     if not token.ownership_set.filter(selling=True).exists():
         token.selling = False
         token.currency_minimal_bid = None
@@ -58,7 +113,7 @@ def recalculate_token_sell_status(ownership):
         if ownerships:
             token.currency_price = ownerships[0].currency_price or ownerships[0].currency_minimal_bid
             token.currency = ownerships[0].currency
-    token.save(update_fields=["selling", "currency_price", "currency"])
+    token.save(update_fields=["selling", "currency_price", "currency", "usd_price"])
 
 
 def update_delete_status(collection):
@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -62,38 +63,51 @@ def end_auction_checker():
 @shared_task(name="incorrect_bid_checker")
 @alert_bot
 def incorrect_bid_checker():
-    bids = Bid.objects.committed()
+    bids = Bid.objects.committed().select_related("user", "token__currency__network")
+    network_bids = defaultdict(list)
     for bid in bids:
-        network = bid.token.currency.network
-        user_balance = network.contract_call(
-            method_type="read",
-            contract_type="token",
-            address=network.get_ethereum_address(bid.token.currency.address),
-            function_name="balanceOf",
-            input_params=(network.get_ethereum_address(bid.user.username),),
-            input_type=("address",),
-            output_types=("uint256",),
-        )
-
-        allowance = network.contract_call(
-            method_type="read",
-            contract_type="token",
-            address=network.get_ethereum_address(bid.token.currency.address),
-            function_name="allowance",
-            input_params=(
-                network.get_ethereum_address(bid.user.username),
-                network.get_ethereum_address(network.exchange_address),
-            ),
-            input_type=("address", "address"),
-            output_types=("uint256",),
-        )
-
-        if (
-            user_balance < bid.amount * bid.quantity
-            or allowance < bid.amount * bid.quantity
-        ):
-            bid.state = Status.EXPIRED
-            bid.save()
+        network_bids[bid.token.currency.network].append(bid)
+
+    expired_bids = []
+    for network, bids in network_bids.items():
+        exchange_address = network.get_ethereum_address(network.exchange_address)
+        calls = []
+        for bid in bids:
+            token_address = network.get_ethereum_address(bid.token.currency.address)
+            user_address = network.get_ethereum_address(bid.user.username)
+            calls.append(
+                {
+                    "contract_type": "token",
+                    "address": token_address,
+                    "function_name": "balanceOf",
+                    "input_params": (user_address,),
+                    "input_type": ("address",),
+                    "output_types": ("uint256",),
+                }
+            )
+            calls.append(
+                {
+                    "contract_type": "token",
+                    "address": token_address,
+                    "function_name": "allowance",
+                    "input_params": (user_address, exchange_address),
+                    "input_type": ("address", "address"),
+                    "output_types": ("uint256",),
+                }
+            )
+        results = network.contract_call_many(calls)
+
+        for bid, user_balance, allowance in zip(bids, results[::2], results[1::2]):
+            # failed calls are checked again on the next run
+            if user_balance is None or allowance is None:
+                continue
+            if (
+                user_balance < bid.amount * bid.quantity
+                or allowance < bid.amount * bid.quantity
+            ):
+                bid.state = Status.EXPIRED
+                expired_bids.append(bid)
+    Bid.objects.bulk_update(expired_bids, ["state"])
 
 
 def check_ethereum_transactions(tx) -> bool:
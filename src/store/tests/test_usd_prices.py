@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+
+from src.rates.models import UsdRate
+from src.services.search import SearchToken
+from src.store.models import Ownership, Status, Token
+from src.store.services.usd_prices import fill_usd_prices, update_usd_prices
+
+
+@pytest.mark.django_db
+def test_usd_price_stored_and_updated_with_rates(mixer):
+    usd_rate = mixer.blend("rates.UsdRate", symbol="ETH", rate=1000, decimal=18)
+    token = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        currency=usd_rate,
+        currency_price=Decimal("0.002"),
+        collection__standart="ERC721",
+    )
+    token_1155 = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        currency=usd_rate,
+        collection__standart="ERC1155",
+    )
+    ownership = mixer.blend(
+        "store.Ownership",
+        token=token_1155,
+        currency_minimal_bid=Decimal("0.003"),
+        currency=usd_rate,
+        selling=True,
+    )
+    assert Token.objects.get(id=token.id).usd_price == Decimal("2")
+    assert Ownership.objects.get(id=ownership.id).usd_price == Decimal("3")
+
+    UsdRate.objects.filter(id=usd_rate.id).update(rate=2000)
+    update_usd_prices(UsdRate.objects.filter(id=usd_rate.id))
+
+    assert Token.objects.get(id=token.id).usd_price == Decimal("4")
+    assert Ownership.objects.get(id=ownership.id).usd_price == Decimal("6")
+
+
+@pytest.mark.django_db
+def test_usd_price_not_stored_is_converted_and_filled(mixer):
+    """Rows saved before usd_price was stored are found by price and filled after migrate"""
+    usd_rate = mixer.blend("rates.UsdRate", symbol="ETH", rate=1000, decimal=18)
+    token = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        currency=usd_rate,
+        currency_price=Decimal("0.003"),
+        collection__standart="ERC721",
+    )
+    Token.objects.filter(id=token.id).update(usd_price=None)
+
+    search = SearchToken()
+    search.initial()
+    search.max_price([4])
+    assert [found.id for found in search.items] == [token.id]
+
+    fill_usd_prices()
+
+    assert Token.objects.get(id=token.id).usd_price == Decimal("3")
+
+
+@pytest.mark.django_db
+def test_ownership_usd_price_updated_with_token_currency(mixer):
+    eth = mixer.blend("rates.UsdRate", symbol="ETH", rate=1000, decimal=18)
+    bnb = mixer.blend("rates.UsdRate", symbol="BNB", rate=100, decimal=18)
+    token = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        currency=eth,
+        collection__standart="ERC1155",
+    )
+    ownership = mixer.blend(
+        "store.Ownership",
+        token=token,
+        currency_price=Decimal("0.01"),
+        currency=eth,
+        selling=True,
+    )
+    assert Ownership.objects.get(id=ownership.id).usd_price == Decimal("10")
+
+    token.currency = bnb
+    token.save(update_fields=["currency"])
+
+    assert Ownership.objects.get(id=ownership.id).usd_price == Decimal("1")
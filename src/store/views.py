@@ -51,6 +51,7 @@ from src.store.serializers import (
 )
 from src.store.services.collection_import import OpenSeaImport
 from src.store.services.ipfs import create_ipfs, send_to_ipfs
+from src.store.services.usd_prices import stored_usd_price
 from src.store.tasks import import_opensea_collection
 from src.utilities import PaginateMixin, sign_message
 
@@ -149,9 +150,20 @@ class SearchView(APIView, PaginateMixin):
             ),
             openapi.Parameter("currency", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="For ordered tokens: next_cursor of the previous page, instead of page",
+            ),
             openapi.Parameter("network", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("creator", openapi.IN_QUERY, type=openapi.TYPE_STRING),
-            openapi.Parameter("text", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "text",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Results are ordered by relevance, order_by replaces it",
+            ),
             openapi.Parameter("owner", openapi.IN_QUERY, type=openapi.TYPE_STRING),
             openapi.Parameter("bids_by", openapi.IN_QUERY, type=openapi.TYPE_STRING),
         ],
@@ -168,12 +180,21 @@ class SearchView(APIView, PaginateMixin):
             )
 
         sort_type = getattr(config.SEARCH_TYPES, sort)
-        result = Search.get(sort_type).parse(
-            current_user=request.user,
-            **params,
+        search = Search.get(sort_type)()
+        items = search.parse(**params)
+
+        response = self.paginate(
+            request,
+            items,
+            search.serializer,
+            context={"user": request.user},
+            total=getattr(search, "total", None),
         )
-
-        return Response(self.paginate(request, result), status=status.HTTP_200_OK)
+        if hasattr(search, "get_cursor") and self.page_items:
+            last_item = self.page_items[-1]
+            if hasattr(last_item, "order_value"):
+                response["next_cursor"] = search.get_cursor(last_item)
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class CreateView(APIView):
@@ -393,8 +414,10 @@ class GetLikedView(APIView, PaginateMixin):
                 if network.lower() in token.collection.network.name.lower()
             ]
 
-        tokens = TokenSerializer(tokens, many=True, context={"user": request.user}).data
-        return Response(self.paginate(request, tokens), status=status.HTTP_200_OK)
+        response = self.paginate(
+            request, tokens, TokenSerializer, context={"user": request.user}
+        )
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class GetView(APIView):
@@ -592,10 +615,10 @@ class GetHotView(APIView, PaginateMixin):
             tokens = tokens.order_by(order)
         if sort in ("cheapest", "highest"):
             tokens = tokens.exclude(price=None).exclude(selling=False)
-        tokens = TokenFullSerializer(
-            tokens, context={"user": request.user}, many=True
-        ).data
-        return Response(self.paginate(request, tokens), status=status.HTTP_200_OK)
+        response = self.paginate(
+            request, tokens, TokenFullSerializer, context={"user": request.user}
+        )
+        return Response(response, status=status.HTTP_200_OK)
 
 
 class GetHotCollectionsView(APIView):
@@ -1328,22 +1351,6 @@ class GetCollectionByAdressView(APIView):
         return Response(response_data, status=status.HTTP_200_OK)
 
 
-def get_token_max_price(token):
-    if not (token.is_selling or token.is_auc_selling):
-        return 0
-    if token.standart == "ERC721":
-        return (
-            token.currency_price if token.currency_price else token.currency_minimal_bid
-        )
-    owners = token.ownership_set.all()
-    prices = [
-        owner.currency_price if owner.currency_price else owner.currency_minimal_bid
-        for owner in owners
-        if owner.selling
-    ]
-    return max(prices)
-
-
 @api_view(http_method_names=["GET"])
 def get_max_price(request):
     network = request.query_params.get("network", config.DEFAULT_NETWORK)
@@ -1351,10 +1358,31 @@ def get_max_price(request):
     tokens = (
         Token.objects.committed().network(network).filter(currency__symbol=currency)
     )
-    token_prices = [get_token_max_price(t) for t in tokens]
+    # the most expensive listing by indexed usd_price, returned in its currency
+    listings = [
+        tokens.filter(
+            Q(currency_price__isnull=False) | Q(currency_minimal_bid__isnull=False),
+            collection__standart="ERC721",
+            selling=True,
+        )
+        .annotate(listing_usd_price=stored_usd_price())
+        .filter(listing_usd_price__isnull=False)
+        .order_by("-listing_usd_price")
+        .first(),
+        Ownership.objects.filter(
+            token__in=tokens.filter(collection__standart="ERC1155"),
+            selling=True,
+        )
+        .annotate(listing_usd_price=stored_usd_price("token__currency"))
+        .filter(listing_usd_price__isnull=False)
+        .order_by("-listing_usd_price")
+        .first(),
+    ]
+    listings = [listing for listing in listings if listing is not None]
     max_price = 100
-    if token_prices:
-        max_price = max(token_prices)
+    if listings:
+        listing = max(listings, key=lambda listing: listing.listing_usd_price)
+        max_price = listing.currency_price or listing.currency_minimal_bid
     return Response({"max_price": max_price}, status=status.HTTP_200_OK)
 
 
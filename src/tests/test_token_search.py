@@ -1347,3 +1347,47 @@ def test_search_order_by_last_sale(mixer):
     ]
 
     token_assert_order_by("sale", _list)
+
+
+@pytest.mark.django_db
+def test_search_order_by_cursor(mixer):
+    """Pages after cursor continue the order, tokens with equal likes by id"""
+    tokens = mixer.cycle(4).blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        name=(name for name in ("token_1", "token_2", "token_3", "token_4")),
+        collection__standart="ERC721",
+    )
+    mixer.cycle(3).blend(
+        "activity.UserAction",
+        method="like",
+        token=(token for token in (tokens[0], tokens[0], tokens[2])),
+    )
+
+    search = SearchToken()
+    search.initial()
+    search.order_by(["-likes"])
+    first_page = list(search.items[:2])
+    assert [token.name for token in first_page] == ["token_1", "token_3"]
+
+    search.initial()
+    search.cursor([search.get_cursor(first_page[-1])])
+    search.order_by(["-likes"])
+    assert [token.name for token in search.items] == ["token_4", "token_2"]
+
+
+@pytest.mark.django_db
+def test_search_token_text_rank(mixer):
+    """Words of description match as full words, name matches rank first"""
+    mixer.cycle(3).blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        name=(name for name in ("Ocean", "Blue Whale", "Bluebird")),
+        description=(text for text in ("blue whale swimming", "painting", "painting")),
+    )
+
+    search = SearchToken()
+    search.initial()
+    search.text(["whale blue"])
+
+    assert [token.name for token in search.items] == ["Blue Whale", "Ocean"]
@@ -1,6 +1,7 @@
 import pytest
 
-from src.utilities import get_page_slice, PaginateMixin
+from src.accounts.models import AdvUser
+from src.utilities import PaginateMixin, get_page_slice
 
 
 @pytest.mark.parametrize(
@@ -66,3 +67,43 @@ def test_paginate_mixin():
     assert response["results_per_page"] == 50
     assert response["results"][0] == "item_0"
     assert response["results"][-1] == "item_49"
+
+
+@pytest.mark.django_db
+def test_paginate_mixin_queryset(mixer):
+    """Queryset is sliced before serialization, only the page is serialized"""
+
+    class Request:
+        query_params = {"page": 2, "items_per_page": 2}
+
+    class Serializer:
+        def __init__(self, items, many, context):
+            self.data = [item.username for item in items]
+
+    mixer.cycle(5).blend("accounts.AdvUser", username=(f"user_{i}" for i in range(5)))
+    users = AdvUser.objects.filter(username__startswith="user_").order_by("username")
+
+    response = PaginateMixin().paginate(Request(), users, Serializer)
+    assert response["total"] == 5
+    assert response["total_pages"] == 3
+    assert response["results"] == ["user_2", "user_3"]
+
+
+@pytest.mark.django_db
+def test_paginate_mixin_unordered_queryset(mixer):
+    """Unordered queryset keeps id order, pages do not overlap"""
+
+    class Request:
+        def __init__(self, page):
+            self.query_params = {"page": page, "items_per_page": 2}
+
+    users = mixer.cycle(3).blend("accounts.AdvUser")
+
+    pages = [
+        PaginateMixin().paginate(Request(page), AdvUser.objects.all())["results"]
+        for page in (1, 2)
+    ]
+    assert [[user.id for user in page] for page in pages] == [
+        [users[0].id, users[1].id],
+        [users[2].id],
+    ]
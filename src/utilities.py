@@ -6,6 +6,7 @@ from math import ceil
 from typing import Tuple
 
 import redis
+from django.db.models import QuerySet
 from django.utils import timezone
 from eth_account import Account
 from web3 import Web3
@@ -97,15 +98,34 @@ class PaginateMixin:
             end = self.page * self.items_per_page
         return start, end
 
-    def paginate(self, request, items):
+    def paginate(self, request, items, serializer=None, context=None, total=None):
+        """
+        Return page of items. Queryset is counted and sliced in the database,
+        unordered queryset is ordered by id, so pages do not overlap.
+        With serializer only items of the page are serialized.
+        Unserialized items of the page are kept in page_items.
+        Total is counted from items if it is not passed.
+        """
         self._parse_request(request)
-        start, end = self.get_page_slice(len(items))
-        pages = len(items) / self.items_per_page
+        if isinstance(items, QuerySet):
+            if not items.ordered:
+                items = items.order_by("id")
+            if total is None:
+                total = items.count()
+        elif total is None:
+            total = len(items)
+        start, end = self.get_page_slice(total)
+        self.page_items = items[start:end]
+        results = self.page_items
+        if serializer is not None:
+            self.page_items = list(self.page_items)
+            results = serializer(self.page_items, many=True, context=context or {}).data
+        pages = total / self.items_per_page
         return {
-            "total": len(items),
+            "total": total,
             "results_per_page": self.items_per_page,
             "total_pages": ceil(pages),
-            "results": items[start:end],
+            "results": results,
         }
 
 